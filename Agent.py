@@ -1,11 +1,12 @@
 import os
-import xml.etree.ElementTree as ET
+from XmlManager import ET  # lxml when available, stdlib ElementTree otherwise
 from datetime import datetime
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 import json
 import asyncio
 import aiohttp
+from http_session import get_session
 from dotenv import load_dotenv
 from abc import ABC, abstractmethod
 
@@ -386,28 +387,30 @@ Only respond with valid JSON. Do not include any other text or explanation."""
         headers = self._get_headers()
         payload = self._get_payload(prompt)
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(self.api_url, headers=headers, json=payload) as response:
-                    if response.status != 200:
-                        response_text = await response.text()
-                        logger.info(f"DEBUG [{self.__class__.__name__}]: API returned status {response.status}")
-                        logger.info(f"DEBUG [{self.__class__.__name__}]: Response body: {response_text}")
-                        raise Exception(f"API request failed with status {response.status}: {response_text}")
-
-                    result = await response.json()
-                    return result['choices'][0]['message']['content']
-            except Exception as e:
-                logger.info(f"Error calling API [{self.__class__.__name__}]: {e}")
-                logger.info(f"Error type: {type(e).__name__}")
-                import traceback
-                logger.info(f"Full traceback:")
-                traceback.print_exc()
-                # Return a default JSON string in case of API failure
-                return json.dumps({
-                    "action": "hold",  # Default action if API fails
-                    "reason": f"API error - holding position. Details: {str(e)} (Type: {type(e).__name__})"
-                })
+        # Reuse the process-wide session so each LLM call doesn't pay a
+        # fresh TCP/TLS handshake
+        session = await get_session()
+        try:
+            async with session.post(self.api_url, headers=headers, json=payload) as response:
+                if response.status != 200:
+                    response_text = await response.text()
+                    logger.info(f"DEBUG [{self.__class__.__name__}]: API returned status {response.status}")
+                    logger.info(f"DEBUG [{self.__class__.__name__}]: Response body: {response_text}")
+                    raise Exception(f"API request failed with status {response.status}: {response_text}")
+
+                result = await response.json()
+                return result['choices'][0]['message']['content']
+        except Exception as e:
+            logger.info(f"Error calling API [{self.__class__.__name__}]: {e}")
+            logger.info(f"Error type: {type(e).__name__}")
+            import traceback
+            logger.info(f"Full traceback:")
+            traceback.print_exc()
+            # Return a default JSON string in case of API failure
+            return json.dumps({
+                "action": "hold",  # Default action if API fails
+                "reason": f"API error - holding position. Details: {str(e)} (Type: {type(e).__name__})"
+            })
 
     def _get_payload(self, prompt: str) -> Dict:
         """Default payload implementation - can be overridden if needed"""
@@ -470,6 +473,9 @@ class TradeXMLManager:
         self.xml_manager = TradingXMLManager(xml_file_path)
         self.root = self.xml_manager.root
         self.kind = kind
+        # Bumped on every write so callers can cache derived views of the
+        # trade data and invalidate only when something actually changed
+        self.version = 0
 
     def _get_agent_section(self):
         """Get the agent section via the shared manager"""
@@ -477,6 +483,7 @@ class TradeXMLManager:
 
     def _write_xml(self):
         """Write the current XML structure to file via the shared manager"""
+        self.version += 1
         self.xml_manager._write_xml()
 
     def add_latest_response(self, response: Dict, kind: str = None):
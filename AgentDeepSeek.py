@@ -7,13 +7,14 @@ from abc import ABC, abstractmethod
 
 # Import the base Trader class
 from Agent import Agent
+from config import CONFIG
 
 
 class AgentDeepSeek(Agent):
     """Class to handle trading decisions using DeepSeek API"""
 
     def __init__(self):
-        self.api_key = os.getenv("DEEPSEEK_API_KEY")
+        self.api_key = CONFIG.deepseek_api_key
         self.api_url = "https://api.deepseek.com/v1/chat/completions"
         self.model = "deepseek-reasoner"  # Using the reasoner version as requested
 
@@ -1,14 +1,17 @@
 import asyncio
+import aiofiles
 import aiohttp
 import json
-import xml.etree.ElementTree as ET
+import time
+from XmlManager import ET  # lxml when available, stdlib ElementTree otherwise
+from collections import deque
+from config import CONFIG
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, Optional
 import os
 import traceback
 import logging
 from dotenv import load_dotenv
-import requests
 
 # Import shared XML manager
 from XmlManager import TradingXMLManager
@@ -20,16 +23,33 @@ from logging_config import logger
 # Import numpy for array operations
 import numpy as np
 
+# Prefer orjson for parsing large kline payloads (~3x faster than stdlib)
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj, default=str).decode()
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj):
+        return json.dumps(obj, default=str)
+
 # Import ta-lib for technical indicators
 try:
     import talib
+    import talib.stream  # single-value API, avoids full output arrays for scalars
     TALIB_AVAILABLE = True
 except ImportError:
     TALIB_AVAILABLE = False
     logger.info("Warning: ta-lib not available, using custom calculations")
 
 # Import Redis utilities for simulation mode
-from redis_utils import get_cached_klines, get_cached_open_interest, get_oldest_cached_timestamp, get_cached_klines_individual_range
+from redis_utils import get_cached_klines, get_cached_open_interest, get_oldest_cached_timestamp, get_cached_klines_individual_range, get_cached_klines_batch, get_cached_open_interest_batch
+
+# JIT-compiled indicator kernels for the simulation seeding pass
+from indicators_numba import compute_all_indicators, batch_all_indicators
 
 
 def calculate_ema(prices: List[float], period: int) -> float:
@@ -135,6 +155,50 @@ def calculate_atr(high_prices: List[float], low_prices: List[float], close_price
     return atr
 
 
+def _ema_update(prev: float, value: float, period: int) -> float:
+    """One-step EMA update: prev + alpha * (value - prev)"""
+    return prev + (2 / (period + 1)) * (value - prev)
+
+
+def _rsi_from_avgs(avg_gain: float, avg_loss: float) -> float:
+    """Convert Wilder average gain/loss into an RSI value"""
+    if avg_loss == 0:
+        return 100.0
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+# Structured layout for the per-coin kline seed pass: one walk over the
+# cached kline dicts yields zero-copy close/high/low views
+_KLINE_SEED_DTYPE = np.dtype([
+    ("close", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+])
+
+# Structured dtype for liquidation orders so filtering/sorting runs at C level
+_LIQUIDATION_DTYPE = np.dtype([
+    ('price', 'f8'),
+    ('qty', 'f8'),
+    ('side', 'U4'),
+    ('symbol', 'U20'),
+    ('time', 'i8')
+])
+
+
+def _top_liquidations(recs: np.ndarray, limit: int = 10) -> List[Dict]:
+    """Return the largest liquidation orders by quantity as a list of dicts"""
+    if len(recs) == 0:
+        return []
+    if len(recs) > limit:
+        # argpartition narrows to the top candidates without a full sort
+        recs = recs[np.argpartition(-recs['qty'], limit)[:limit]]
+    recs = recs[np.argsort(-recs['qty'])]
+    return [
+        {"price": float(r['price']), "qty": float(r['qty']), "side": str(r['side']), "symbol": str(r['symbol'])}
+        for r in recs
+    ]
+
+
 # Load environment variables
 load_dotenv()
 
@@ -142,22 +206,56 @@ load_dotenv()
 class BinanceMarketDataFetcher:
     """Class to fetch market data from Binance API"""
 
+    # What a symbol supports doesn't change at runtime, so these memos are
+    # class-level: every instance - including short-lived ones - shares what
+    # has already been learned instead of re-probing from scratch.
+    # Which long-term interval ("4h" or "1h") actually has data per symbol,
+    # so the fallback chain isn't re-probed every cycle
+    _long_term_intervals: Dict[str, str] = {}
+    # Coins learned to have no coin-margined (USD_PERP) perpetual, so we
+    # stop paying a round trip for an empty funding-rate response
+    _no_coin_margined: set = set()
+
     def __init__(self):
         self.base_url = "https://api.binance.com"  # For spot market data
         self.futures_url = "https://fapi.binance.com"  # For futures market data
         self.spot_session = None  # For spot API (no auth required)
         self.futures_session = None  # For futures API (auth required)
         # Load API keys
-        self.api_key = os.getenv("BINANCE_API_KEY")
-        self.secret_key = os.getenv("BINANCE_SECRET_KEY")
+        self.api_key = CONFIG.binance_api_key
+        self.secret_key = CONFIG.binance_secret_key
+        # TTL cache for slow-moving endpoints, keyed by (endpoint, symbol).
+        # Funding rate only changes every 8h, open interest roughly once a
+        # minute and the 24hr ticker about once a second, so there is no
+        # point re-fetching them on every coordinator cycle.
+        self._cache: Dict[tuple, tuple] = {}
+        # Caps concurrent liquidation requests so a burst across all coins
+        # stays inside Binance's rate limits
+        self._liq_sem = asyncio.Semaphore(10)
+
+    def _cache_get(self, key: tuple, ttl: float):
+        """Return a cached value if it is younger than ttl seconds, else None"""
+        cached = self._cache.get(key)
+        if cached is not None and time.time() - cached[0] < ttl:
+            return cached[1]
+        return None
+
+    def _cache_put(self, key: tuple, value):
+        """Store a value in the TTL cache with the current timestamp"""
+        self._cache[key] = (time.time(), value)
 
     async def __aenter__(self):
         # Create separate sessions for spot and futures
+        # Keep-alive connection pools so repeated calls reuse warm TCP/TLS
+        # connections instead of paying a fresh handshake per request
         # Spot session: no auth headers but with user agent
         spot_headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
-        self.spot_session = aiohttp.ClientSession(headers=spot_headers)
+        self.spot_session = aiohttp.ClientSession(
+            headers=spot_headers,
+            connector=aiohttp.TCPConnector(limit_per_host=20, ttl_dns_cache=300, keepalive_timeout=60)
+        )
 
         # Futures session: with API key headers if available, plus user agent
         futures_headers = {
@@ -165,7 +263,10 @@ class BinanceMarketDataFetcher:
         }
         if self.api_key:
             futures_headers["X-MBX-APIKEY"] = self.api_key
-        self.futures_session = aiohttp.ClientSession(headers=futures_headers)
+        self.futures_session = aiohttp.ClientSession(
+            headers=futures_headers,
+            connector=aiohttp.TCPConnector(limit_per_host=20, ttl_dns_cache=300, keepalive_timeout=60)
+        )
 
         return self
 
@@ -178,14 +279,14 @@ class BinanceMarketDataFetcher:
     async def get_ticker_price(self, symbol: str) -> float:
         """Get current ticker price for a symbol (using spot API)"""
         # Set the API endpoint for the coin1/coin2 pair
-        api_endpoint = 'https://api.binance.com/api/v3/ticker/price?symbol=' + symbol
-        response = requests.get(api_endpoint)
+        api_endpoint = f"{self.base_url}/api/v3/ticker/price"
 
         try:
-            # Parse the JSON data from the response and extract the current price
-            data = response.json()
-            current_price = float(data['price'])
-            return current_price
+            async with self.spot_session.get(api_endpoint, params={"symbol": symbol}) as response:
+                # Parse the JSON data from the response and extract the current price
+                data = await response.json()
+                current_price = float(data['price'])
+                return current_price
         except Exception as e:
             logger.info(f"Exception fetching ticker price for {symbol}: {e}")
             return 0.0
@@ -201,172 +302,224 @@ class BinanceMarketDataFetcher:
         }
 
         try:
-            response = requests.get(endpoint, params=params)
-            logger.info(f"DEBUG: Kline request for {symbol} {interval}: status {response.status_code}")
-            if response.status_code != 200:
-                logger.info(f"Error fetching klines for {symbol}: {response.status_code}")
-                # Check if the symbol exists by trying ticker price first
-                try:
-                    price_response = requests.get(f"{self.futures_url}/fapi/v1/ticker/price", params={"symbol": symbol})
-                    if price_response.status_code == 200:
-                        price_data = price_response.json()
-                        logger.info(f"DEBUG: Symbol {symbol} exists, price: {price_data.get('price', 'unknown')}")
-                    else:
-                        logger.info(f"DEBUG: Symbol {symbol} does not exist or is not available: {price_response.status_code}")
-                except Exception as price_e:
-                    logger.info(f"DEBUG: Error checking symbol existence: {price_e}")
-                return []
-
-            data = response.json()
-            logger.info(f"DEBUG: Received {len(data) if data else 0} kline records for {symbol} {interval}")
-            # Return full kline data: [open, high, low, close, volume, ...]
-            return [[float(kline[1]), float(kline[2]), float(kline[3]), float(kline[4]), float(kline[5])] for kline in data]  # [1]=open, [2]=high, [3]=low, [4]=close, [5]=volume
+            async with self.futures_session.get(endpoint, params=params) as response:
+                logger.info(f"DEBUG: Kline request for {symbol} {interval}: status {response.status}")
+                if response.status != 200:
+                    logger.debug(f"klines failed for {symbol} status={response.status}")
+                    return []
+
+                data = _json_loads(await response.read())
+                logger.info(f"DEBUG: Received {len(data) if data else 0} kline records for {symbol} {interval}")
+                if not data:
+                    return []
+                # Return full kline data: [open, high, low, close, volume]
+                # Columns [1]=open, [2]=high, [3]=low, [4]=close, [5]=volume are
+                # converted in one C-level pass instead of per-element float()
+                return np.asarray(data, dtype=object)[:, 1:6].astype(np.float64).tolist()
         except Exception as e:
             logger.info(f"Exception fetching klines for {symbol}: {e}")
             return []
     
+    async def get_long_term_klines(self, symbol: str, limit: int = 200) -> List:
+        """Get long-term kline data, preferring 4h and falling back to 1h.
+
+        The interval that last returned enough data is cached per symbol so
+        subsequent cycles issue a single request instead of walking the
+        fallback chain again.
+        """
+        intervals = ["4h", "1h"]
+        cached_interval = self._long_term_intervals.get(symbol)
+        if cached_interval in intervals:
+            intervals.remove(cached_interval)
+            intervals.insert(0, cached_interval)
+
+        for interval in intervals:
+            data = await self.get_klines(symbol, interval, limit)
+            if data and len(data) >= 100:
+                self._long_term_intervals[symbol] = interval
+                return data
+            logger.info(f"DEBUG: {interval} failed or insufficient data ({len(data) if data else 0} records) for {symbol}")
+
+        return []
+
     async def get_24hr_ticker(self, symbol: str) -> Dict:
         """Get 24hr ticker data for a symbol (using futures API)"""
+        cached = self._cache_get(("24hr_ticker", symbol), ttl=1)
+        if cached is not None:
+            return cached
+
         endpoint = f"{self.futures_url}/fapi/v1/ticker/24hr"
         params = {"symbol": symbol}
 
         try:
-            response = requests.get(endpoint, params=params)
-            if response.status_code != 200:
-                logger.info(f"Error fetching 24hr ticker for {symbol}: {response.status_code}")
-                return {}
-
-            return response.json()
+            async with self.futures_session.get(endpoint, params=params) as response:
+                if response.status != 200:
+                    logger.info(f"Error fetching 24hr ticker for {symbol}: {response.status}")
+                    return {}
+
+                data = await response.json()
+                self._cache_put(("24hr_ticker", symbol), data)
+                return data
         except Exception as e:
             logger.info(f"Exception fetching 24hr ticker for {symbol}: {e}")
             return {}
     
     async def get_open_interest(self, symbol: str) -> Dict:
-        """Get open interest data for a symbol (futures)"""
+        """Get open interest data for a symbol (futures). Expects a canonical symbol like BTCUSDT"""
+        cached = self._cache_get(("open_interest", symbol), ttl=30)
+        if cached is not None:
+            return cached
+
         # Binance futures API for open interest
         endpoint = f"{self.futures_url}/fapi/v1/openInterest"
-        params = {"symbol": f"{symbol}USDT"}  # Assuming USDT futures
+        params = {"symbol": symbol}
 
         try:
-            response = requests.get(endpoint, params=params)
-            if response.status_code != 200:
-                logger.info(f"Error fetching open interest for {symbol}: {response.status_code}")
-                # Return default values when API call fails
-                return {
-                    "symbol": f"{symbol}USDT",
-                    "openInterest": "0.0",
-                    "time": int(datetime.now().timestamp() * 1000)  # Current timestamp in milliseconds
-                }
-
-            return response.json()
+            async with self.futures_session.get(endpoint, params=params) as response:
+                if response.status != 200:
+                    logger.info(f"Error fetching open interest for {symbol}: {response.status}")
+                    # Return default values when API call fails
+                    return {
+                        "symbol": symbol,
+                        "openInterest": "0.0",
+                        "time": int(datetime.now().timestamp() * 1000)  # Current timestamp in milliseconds
+                    }
+
+                data = await response.json()
+                self._cache_put(("open_interest", symbol), data)
+                return data
         except Exception as e:
             logger.info(f"Exception fetching open interest for {symbol}: {e}")
             # Return default values when exception occurs
             return {
-                "symbol": f"{symbol}USDT",
+                "symbol": symbol,
                 "openInterest": "0.0",
                 "time": int(datetime.now().timestamp() * 1000)  # Current timestamp in milliseconds
             }
     
     async def get_liquidation_orders(self, symbol: str) -> Dict[str, List | int]:
-        """Get liquidation orders data for a symbol (futures)."""
-        # Ensure symbol is in correct format (e.g., BNBUSDT)
-        symbol = symbol.upper() + "USDT" if not symbol.endswith("USDT") else symbol.upper()
+        """Get liquidation orders data for a symbol (futures). Expects a canonical symbol like BNBUSDT"""
+        # This TTL cache only produces hits because the coordinator keeps
+        # one fetcher alive across cycles (see MarketCoordinator._get_fetcher);
+        # on a throwaway instance it would be dead weight. The live loop
+        # currently skips liquidation data entirely, so this path only runs
+        # for callers that opt in.
+        cached = self._cache_get(("liquidations", symbol), ttl=60)
+        if cached is not None:
+            return cached
+
         endpoint = f"{self.futures_url}/fapi/v1/allForceOrders"
         params = {
             "symbol": symbol,
             "limit": 100,  # Max 1000, default 50
-            # Optional: Add time range (in milliseconds)
-            # "startTime": int(time.time() * 1000) - 24*60*60*1000,  # Last 24 hours
-            # "endTime": int(time.time() * 1000),
+            # Bound the window server-side so the payload stays small
+            "startTime": int(time.time() * 1000) - 60 * 60 * 1000,  # Last hour
         }
 
         try:
-            response = requests.get(endpoint, params=params)
-            if response.status_code != 200:
-                try:
-                    error_data = response.json()
-                    logger.info(f"Error fetching liquidation orders for {symbol}: {response.status_code}, Details: {error_data}")
-                except Exception:
-                    error_text = response.text
-                    logger.info(f"Error fetching liquidation orders for {symbol}: {response.status_code}, Details: {error_text}")
-                return {"rows": [], "total": 0}
-
-            data = response.json()
-            if not isinstance(data, list):
-                logger.info(f"Unexpected response format for {symbol}: {data}")
-                return {"rows": [], "total": 0}
-
-            return {"rows": data, "total": len(data)}
+            async with self._liq_sem:
+                async with self.futures_session.get(endpoint, params=params) as response:
+                    if response.status != 200:
+                        try:
+                            error_data = await response.json()
+                            logger.info(f"Error fetching liquidation orders for {symbol}: {response.status}, Details: {error_data}")
+                        except Exception:
+                            error_text = await response.text()
+                            logger.info(f"Error fetching liquidation orders for {symbol}: {response.status}, Details: {error_text}")
+                        return {"rows": [], "total": 0}
+
+                    data = await response.json()
+                    if not isinstance(data, list):
+                        logger.info(f"Unexpected response format for {symbol}: {data}")
+                        return {"rows": [], "total": 0}
+
+                    result = {"rows": data, "total": len(data)}
+                    self._cache_put(("liquidations", symbol), result)
+                    return result
         except Exception as e:
             logger.info(f"Exception fetching liquidation orders for {symbol}: {e}")
             return {"rows": [], "total": 0}
+
+    async def get_liquidation_orders_many(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fetch liquidation orders for many symbols concurrently.
+
+        The per-fetcher semaphore bounds how many requests are in flight at
+        once, so total latency approaches the slowest single call instead of
+        the sum across symbols.
+        """
+        results = await asyncio.gather(*(self.get_liquidation_orders(s) for s in symbols))
+        return dict(zip(symbols, results))
     
     async def get_funding_rate(self, symbol: str) -> Dict:
         """Get funding rate data for a symbol (futures)"""
-        # Binance futures API for funding rate - both USDT and USD (coin-margined)
-        funding_rates = {}
+        cached = self._cache_get(("funding_rate", symbol), ttl=60)
+        if cached is not None:
+            return cached
 
-        # Get USDT-margined funding rate
-        usdt_endpoint = f"{self.futures_url}/fapi/v1/fundingRate"
-        usdt_params = {"symbol": f"{symbol}USDT"}
+        # Binance futures API for funding rate - both USDT and USD (coin-margined)
+        funding_rates = {
+            "usd_funding_rate": 0.0,
+            "usd_funding_timestamp": 0,
+            "usd_next_funding_time": 0,
+        }
 
-        try:
-            response = requests.get(usdt_endpoint, params=usdt_params)
-            if response.status_code == 200:
-                data = response.json()
-                if data:  # Check if list is not empty
-                    latest_funding = data[-1]  # Get the most recent funding rate
-                    funding_rates["usdt_funding_rate"] = float(latest_funding.get("fundingRate", 0))
-                    funding_rates["usdt_funding_timestamp"] = int(latest_funding.get("fundingTime", 0))
-                    funding_rates["usdt_next_funding_time"] = int(latest_funding.get("nextFundingTime", 0))
-                else:
-                    # Default values if no data returned
-                    funding_rates["usdt_funding_rate"] = 0.0
-                    funding_rates["usdt_funding_timestamp"] = 0
-                    funding_rates["usdt_next_funding_time"] = 0
-            else:
-                logger.info(f"Error fetching USDT funding rate for {symbol}: {response.status_code}")
-                # Default values on error
-                funding_rates["usdt_funding_rate"] = 0.0
-                funding_rates["usdt_funding_timestamp"] = 0
-                funding_rates["usdt_next_funding_time"] = 0
-        except Exception as e:
-            logger.info(f"Exception fetching USDT funding rate for {symbol}: {e}")
-            # Default values on exception
+        async def fetch_usdt_funding():
+            # Get USDT-margined funding rate
+            usdt_endpoint = f"{self.futures_url}/fapi/v1/fundingRate"
+            usdt_params = {"symbol": f"{symbol}USDT"}
+            try:
+                async with self.futures_session.get(usdt_endpoint, params=usdt_params) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        if data:  # Check if list is not empty
+                            latest_funding = data[-1]  # Get the most recent funding rate
+                            funding_rates["usdt_funding_rate"] = float(latest_funding.get("fundingRate", 0))
+                            funding_rates["usdt_funding_timestamp"] = int(latest_funding.get("fundingTime", 0))
+                            funding_rates["usdt_next_funding_time"] = int(latest_funding.get("nextFundingTime", 0))
+                            return
+                    else:
+                        logger.info(f"Error fetching USDT funding rate for {symbol}: {response.status}")
+            except Exception as e:
+                logger.info(f"Exception fetching USDT funding rate for {symbol}: {e}")
+            # Default values if no data returned / on error / on exception
             funding_rates["usdt_funding_rate"] = 0.0
             funding_rates["usdt_funding_timestamp"] = 0
             funding_rates["usdt_next_funding_time"] = 0
 
-        # Get USD (coin-margined) funding rate if available
-        try:
-            usd_endpoint = f"{self.futures_url}/dapi/v1/fundingRate"
-            usd_params = {"symbol": f"{symbol}USD_PERP"}  # Coin-margined futures
-
-            response = requests.get(usd_endpoint, params=usd_params)
-            if response.status_code == 200:
-                data = response.json()
-                if data:  # Check if list is not empty
-                    latest_funding = data[-1]  # Get the most recent funding rate
-                    funding_rates["usd_funding_rate"] = float(latest_funding.get("fundingRate", 0))
-                    funding_rates["usd_funding_timestamp"] = int(latest_funding.get("fundingTime", 0))
-                    funding_rates["usd_next_funding_time"] = int(latest_funding.get("nextFundingTime", 0))
-                else:
-                    # Default values if no data returned
-                    funding_rates["usd_funding_rate"] = 0.0
-                    funding_rates["usd_funding_timestamp"] = 0
-                    funding_rates["usd_next_funding_time"] = 0
-            else:
-                # Some coins may not have USD perpetual futures, so we set to 0
-                funding_rates["usd_funding_rate"] = 0.0
-                funding_rates["usd_funding_timestamp"] = 0
-                funding_rates["usd_next_funding_time"] = 0
-        except Exception as e:
-            # Some coins may not have USD perpetual futures, so we set to 0
-            funding_rates["usd_funding_rate"] = 0.0
-            funding_rates["usd_funding_timestamp"] = 0
-            funding_rates["usd_next_funding_time"] = 0
-
+        async def fetch_usd_funding():
+            # Get USD (coin-margined) funding rate if available. Skip the
+            # request entirely for coins we've already seen return nothing -
+            # the endpoint still costs a full round trip per cycle for them.
+            if symbol in self._no_coin_margined:
+                return
+            try:
+                usd_endpoint = f"{self.futures_url}/dapi/v1/fundingRate"
+                usd_params = {"symbol": f"{symbol}USD_PERP"}  # Coin-margined futures
+
+                async with self.futures_session.get(usd_endpoint, params=usd_params) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        if data:  # Check if list is not empty
+                            latest_funding = data[-1]  # Get the most recent funding rate
+                            funding_rates["usd_funding_rate"] = float(latest_funding.get("fundingRate", 0))
+                            funding_rates["usd_funding_timestamp"] = int(latest_funding.get("fundingTime", 0))
+                            funding_rates["usd_next_funding_time"] = int(latest_funding.get("nextFundingTime", 0))
+                        else:
+                            # Empty response - no coin-margined perpetual for this coin
+                            self._no_coin_margined.add(symbol)
+                    else:
+                        # Transient error (rate limit, 5xx...) - keep 0 for this
+                        # cycle but don't learn anything; only a definitive
+                        # 200-with-empty-list marks the coin as unsupported
+                        pass
+            except Exception:
+                # Some coins may not have USD perpetual futures, so we keep 0
+                pass
+
+        # The two endpoints are independent, so overlap the round trips
+        await asyncio.gather(fetch_usdt_funding(), fetch_usd_funding())
+
+        self._cache_put(("funding_rate", symbol), funding_rates)
         return funding_rates
 
 
@@ -375,6 +528,85 @@ class MarketCoordinator:
 
     COINS = ["BTC", "ETH", "BNB", "XRP", "DOGE", "SOL"]
 
+    # Static prompt prefix, materialized once instead of rebuilding the same
+    # f-strings on every cycle; only {minutes} and {now} change per call
+    _PROMPT_PREFIX_TEMPLATE = "\n".join([
+        "USER_PROMPT",
+        "It has been {minutes} minutes since you started trading. The current time is {now} and you've been invoked {minutes} times. Below, we are providing you with a variety of state data, price data, and predictive signals so you can discover alpha. Below that is your current account information, value, performance, positions, etc.",
+        "",
+        "ALL OF THE PRICE OR SIGNAL DATA BELOW IS ORDERED: OLDEST → NEWEST",
+        "",
+        "Timeframes note: Unless stated otherwise in a section title, intraday series are provided at 3‑minute intervals. If a coin uses a different interval, it is explicitly stated in that coin's section.",
+        "",
+        "CURRENT MARKET STATE FOR ALL COINS"
+    ])
+
+    # Simulation variant of the prompt prefix, same shape with the
+    # simulation wording and 5-minute interval note
+    _SIM_PROMPT_PREFIX_TEMPLATE = "\n".join([
+        "USER_PROMPT (SIMULATION MODE)",
+        "It has been {minutes} minutes since you started trading. The current simulation time is {now} and you've been invoked {invocations} times. Below, we are providing you with a variety of state data, price data, and predictive signals so you can discover alpha. Below that is your current account information, value, performance, positions, etc.",
+        "",
+        "ALL OF THE PRICE OR SIGNAL DATA BELOW IS ORDERED: OLDEST → NEWEST",
+        "",
+        "Timeframes note: Unless stated otherwise in a section title, intraday series are provided at 5\u2011minute intervals for simulation. If a coin uses a different interval, it is explicitly stated in that coin's section.",
+        "",
+        "CURRENT MARKET STATE FOR ALL COINS (SIMULATION)"
+    ])
+
+    _PROMPT_FOOTER = "---END OF USER PROMPT---"
+    _SIM_PROMPT_FOOTER = "---END OF USER PROMPT (SIMULATION)---"
+
+    # Per-coin prompt block, materialized with one .format() call per coin
+    # instead of assembling ~40 f-strings in a list; only the placeholders
+    # actually change between cycles
+    _COIN_TEMPLATE = "\n".join([
+        "ALL {coin} DATA{mode_suffix}",
+        "current_price = {current_price}, current_ema20 = {current_ema20}, current_macd = {current_macd}, current_rsi (7 period) = {current_rsi}",
+        "",
+        "In addition, here is the latest {coin} open interest and funding rate for perps (the instrument you are trading):",
+        "",
+        "Open Interest: Latest: {open_interest} Average: {open_interest}",
+        "",
+        "Funding Rate: {funding_rate}",
+        "",
+        "{intraday_header}",
+        "",
+        "Mid prices: {intraday_prices}",
+        "EMA indicators (20‑period): {ema_20_series}",
+        "MACD value indicators: {macd_value_series}",
+        "MACD signal indicators: {macd_signal_series}",
+        "RSI indicators (7‑Period): {rsi_7_series}",
+        "RSI indicators (14‑Period): {rsi_14_series}",
+        "",
+        "Liquidation Orders (Biggest 10 Buy/Sell in past 24h):",
+        "",
+        "Top 10 Buy Liquidations:",
+        "{buy_liquidations}",
+        "",
+        "Top 10 Sell Liquidations:",
+        "{sell_liquidations}",
+        "",
+        "Longer‑term context (4‑hour timeframe):",
+        "",
+        "20‑Period EMA: {long_term_ema_20} vs. 50‑Period EMA: {long_term_ema_50}",
+        "3‑Period ATR: {atr_3_period} vs. 14‑Period ATR: {atr_14_period}",
+        "Current Volume: {current_volume} vs. Average Volume: {avg_volume}",
+        "MACD indicators: {long_macd_series}",
+        "RSI indicators (14‑Period): {long_rsi_14_series}",
+        ""
+    ])
+
+    @staticmethod
+    def _format_liquidation_lines(orders, side: str) -> str:
+        """Format the top liquidation orders for the prompt, one line each"""
+        if not orders:
+            return f"  No significant {side} liquidations in past 24h"
+        return "\n".join(
+            f"  {i}. Price: {order['price']:.2f}, Quantity: {order['qty']:.6f}"
+            for i, order in enumerate(orders, 1)
+        )
+
     def __init__(self, xml_file_path: str = "trade.xml", simulation_mode: bool = False):
         self.coins = self.COINS
         self.xml_manager = TradingXMLManager(xml_file_path)
@@ -383,16 +615,68 @@ class MarketCoordinator:
         self.liquidation_client = BinanceLiquidationClient(tracked_symbols=self.coins) if not simulation_mode else None
         self.simulation_mode = simulation_mode
         self.simulation_timestamp = None  # Will track current simulation time
+        # Canonical futures symbols, computed once instead of per loop iteration
+        self._futures_symbols = {coin: f"{coin}USDT" for coin in self.coins}
+        # Streaming indicator state per coin for simulation mode: seeded with
+        # one full ta-lib pass, then updated incrementally per new bar
+        self._indicator_state: Dict[str, Dict] = {}
+        # Cached tag -> Element maps per coin so state_of_market updates patch
+        # text in place instead of rebuilding the subtree every tick
+        self._coin_elem_cache: Dict[str, Dict[str, ET.Element]] = {}
+        # Dirty flag so tree mutations are flushed to disk once per cycle
+        # instead of serializing the whole document after every update
+        self._xml_dirty = False
+        # Serialized active trades keyed by the trade-XML version so the JSON
+        # dump is only redone when a trade actually changed
+        self._active_trades_json_cache = (-1, None)
+        # Per-tick memo for XML tree lookups shared by the prompt builders
+        # and PNL updater; cleared at the top of each update cycle
+        self._tick_cache: dict = {}
+        # Rolling open-interest window per coin for simulation mode; each
+        # tick only the new tail is fetched from Redis instead of the full
+        # 50-point window
+        self._oi_buffer: Dict[str, deque] = {}
+        # One market-data fetcher for the coordinator's whole lifetime
+        # (opened lazily, closed in close()). Its TTL cache, long-term
+        # interval memo and no-coin-margined set only pay off if the same
+        # instance survives across update cycles.
+        self._fetcher: Optional[BinanceMarketDataFetcher] = None
         self.initial_simulation_timestamp = datetime(2022, 2, 1, 0, 0, 0, tzinfo=timezone.utc).timestamp()  # Track initial simulation time - January 1, 2022 00:00:00 UTC (skip 2021 due to XRP data issues)
         
+    def _tick_cached(self, key, supplier):
+        """Return a value memoized for the current update cycle"""
+        if key not in self._tick_cache:
+            self._tick_cache[key] = supplier()
+        return self._tick_cache[key]
+
+    def _active_trades_json(self, active_trades) -> str:
+        """Serialize active trades, reusing the cached JSON until a trade changes"""
+        version = self.trade_xml_manager.version
+        cached_version, cached_json = self._active_trades_json_cache
+        if version != cached_version:
+            cached_json = _json_dumps(active_trades)
+            self._active_trades_json_cache = (version, cached_json)
+        return cached_json
+
     def _initialize_xml(self):
         """Initialize is now handled by the shared XML manager"""
         # No need to implement this anymore as it's handled by shared manager
         pass
-    
+
+    async def _get_fetcher(self) -> BinanceMarketDataFetcher:
+        """Return the persistent market-data fetcher, opening it on first use"""
+        if self._fetcher is None:
+            self._fetcher = await BinanceMarketDataFetcher().__aenter__()
+        return self._fetcher
+
     async def prepare_market_state(self) -> str:
         """Prepare the market state by fetching data from Binance or Redis (simulation mode) and return a user prompt"""
 
+        # Fresh memo of XML lookups for this tick. Clearing here (not in the
+        # update loop) keeps direct callers correct too - later lookups in
+        # the same tick still share the memo.
+        self._tick_cache.clear()
+
         # Skip background liquidation collection to avoid WebSocket timeout issues
         # if not self.simulation_mode and self.liquidation_client:
         #     await self.liquidation_client.start_background_collection()
@@ -404,33 +688,29 @@ class MarketCoordinator:
         if self.simulation_mode:
             return await self._prepare_simulation_market_state()
         else:
-            async with BinanceMarketDataFetcher() as fetcher:
-                # Prepare the market data section
-                market_state_parts = [
-                f"USER_PROMPT",
-                f"It has been {int(datetime.now().timestamp() // 60)} minutes since you started trading. The current time is {datetime.now()} and you've been invoked {int(datetime.now().timestamp() // 60)} times. Below, we are providing you with a variety of state data, price data, and predictive signals so you can discover alpha. Below that is your current account information, value, performance, positions, etc.",
-                f"",
-                f"ALL OF THE PRICE OR SIGNAL DATA BELOW IS ORDERED: OLDEST → NEWEST",
-                f"",
-                f"Timeframes note: Unless stated otherwise in a section title, intraday series are provided at 3‑minute intervals. If a coin uses a different interval, it is explicitly stated in that coin's section.",
-                f"",
-                f"CURRENT MARKET STATE FOR ALL COINS"
+            fetcher = await self._get_fetcher()
+            # Prepare the market data section
+            now = datetime.now()
+            market_state_parts = [
+                self._PROMPT_PREFIX_TEMPLATE.format(minutes=int(now.timestamp() // 60), now=now)
             ]
 
             all_coin_data = {}
+            # One timestamp for the whole tick; the per-coin dicts share it
+            tick_iso = now.isoformat()
 
             # Fetch data for each coin
             for coin in self.coins:
-                symbol = f"{coin}USDT"  # Binance futures pairs typically use USDT
+                symbol = self._futures_symbols[coin]  # Binance futures pairs typically use USDT
 
                 # Get current price
                 current_price = await fetcher.get_ticker_price(symbol)
                 logger.info(f"DEBUG: Current price for {symbol}: {current_price}")
 
-                # Get kline data for indicators (3-minute intervals) - getting more data points for proper calculations
-                # Need at least 50 data points to properly calculate EMA20, MACD (12,26,9), and RSI
-                # But we'll only keep the last 10 values for the series in the XML
-                kline_data = await fetcher.get_klines(symbol, "3m", 50)
+                # Get kline data for indicators (3-minute intervals)
+                # 45 bars covers the MACD(12,26,9) warm-up (26+9) plus the
+                # 10-value tail we actually keep for the series in the XML
+                kline_data = await fetcher.get_klines(symbol, "3m", 45)
                 logger.info(f"DEBUG: Kline data for {symbol}: {len(kline_data)} records")
                 kline_prices = [k[3] for k in kline_data]  # Close prices
                 kline_highs = [k[1] for k in kline_data]   # High prices
@@ -438,17 +718,13 @@ class MarketCoordinator:
                 kline_volumes = [k[4] for k in kline_data] # Volume data
 
                 # Get longer term kline data for 4-hour timeframe (request more data for proper calculations)
-                logger.info(f"DEBUG: Fetching 4h klines for {symbol}")
-                kline_4h_data = await fetcher.get_klines(symbol, "4h", 200)  # Request more data for proper calculations
-                logger.info(f"DEBUG: 4h data for {symbol}: {len(kline_4h_data) if kline_4h_data else 0} records")
-                if not kline_4h_data or len(kline_4h_data) < 100:
-                    logger.info(f"DEBUG: 4h failed or insufficient data ({len(kline_4h_data) if kline_4h_data else 0} records), trying 1h for {symbol}")
-                    kline_4h_data = await fetcher.get_klines(symbol, "1h", 200)
-                    logger.info(f"DEBUG: 1h data for {symbol}: {len(kline_4h_data) if kline_4h_data else 0} records")
-                    if not kline_4h_data or len(kline_4h_data) < 100:
-                        logger.info(f"DEBUG: 1h also failed or insufficient data ({len(kline_4h_data) if kline_4h_data else 0} records), using 3m data for {symbol}")
-                        # Last resort: use 3m data for calculations
-                        kline_4h_data = kline_data[:200] if len(kline_data) >= 200 else kline_data
+                logger.info(f"DEBUG: Fetching long-term klines for {symbol}")
+                kline_4h_data = await fetcher.get_long_term_klines(symbol, 200)
+                logger.info(f"DEBUG: Long-term data for {symbol}: {len(kline_4h_data) if kline_4h_data else 0} records")
+                if not kline_4h_data:
+                    logger.info(f"DEBUG: Long-term intervals unavailable, using 3m data for {symbol}")
+                    # Last resort: use 3m data for calculations
+                    kline_4h_data = kline_data[:200] if len(kline_data) >= 200 else kline_data
 
                 kline_4h_prices = [k[3] for k in kline_4h_data] if kline_4h_data else []  # Close prices
                 kline_4h_highs = [k[1] for k in kline_4h_data] if kline_4h_data else []   # High prices
@@ -463,7 +739,7 @@ class MarketCoordinator:
                 liquidation_orders = {"rows": [], "total": 0}
 
                 # Get open interest
-                open_interest = await fetcher.get_open_interest(coin)
+                open_interest = await fetcher.get_open_interest(symbol)
 
                 # Get funding rate
                 funding_data = await fetcher.get_funding_rate(coin)
@@ -486,20 +762,24 @@ class MarketCoordinator:
                     float(macd_hist[-1]) if len(macd_hist) > 0 and not np.isnan(macd_hist[-1]) else 0
                 )
 
-                # Calculate RSI using talib
-                rsi_result = talib.RSI(prices_np, timeperiod=7)
-                current_rsi = float(rsi_result[-1]) if len(rsi_result) > 0 and not np.isnan(rsi_result[-1]) else 50.0
+                # Calculate RSI using talib (computed once, reused for both
+                # the current value and the series output)
+                rsi_7_result = talib.RSI(prices_np, timeperiod=7)
+                current_rsi = float(rsi_7_result[-1]) if len(rsi_7_result) > 0 and not np.isnan(rsi_7_result[-1]) else 50.0
 
-                # Generate series data using talib
-                ema_20_series = [float(x) if not np.isnan(x) else kline_prices[i] for i, x in enumerate(ema20_result)]
-                macd_value_series = [float(x) if not np.isnan(x) else 0 for x in macd_result]
-                macd_signal_series = [float(x) if not np.isnan(x) else 0 for x in macd_signal]
+                # Generate series data using talib - slice to the 10-value tail
+                # first so only the values we keep are converted to Python floats
+                ema_tail = ema20_result[-10:]
+                ema_20_series = np.where(np.isnan(ema_tail), prices_np[-len(ema_tail):], ema_tail).tolist()
+                macd_value_series = np.nan_to_num(macd_result[-10:]).tolist()
+                macd_signal_series = np.nan_to_num(macd_signal[-10:]).tolist()
 
-                rsi_7_result = talib.RSI(prices_np, timeperiod=7)
-                rsi_7_series = [float(x) if not np.isnan(x) else 50.0 for x in rsi_7_result]
+                rsi_tail = rsi_7_result[-10:]
+                rsi_7_series = np.where(np.isnan(rsi_tail), 50.0, rsi_tail).tolist()
 
                 rsi_14_result = talib.RSI(prices_np, timeperiod=14)
-                rsi_14_series = [float(x) if not np.isnan(x) else 50.0 for x in rsi_14_result]
+                rsi_14_tail = rsi_14_result[-10:]
+                rsi_14_series = np.where(np.isnan(rsi_14_tail), 50.0, rsi_14_tail).tolist()
 
                 # Calculate long-term indicators from 4-hour data using ta-lib
                 logger.info(f"DEBUG: Starting calculations for {symbol}, data_len={len(kline_4h_prices)}")
@@ -509,140 +789,95 @@ class MarketCoordinator:
                 highs_np = np.array(kline_4h_highs, dtype=float)
                 lows_np = np.array(kline_4h_lows, dtype=float)
 
-                # Calculate EMAs using ta-lib
-                ema20_result = talib.EMA(prices_np, timeperiod=20)
-                ema50_result = talib.EMA(prices_np, timeperiod=50)
-
-                long_term_ema_20 = float(ema20_result[-1]) if len(ema20_result) > 0 and not np.isnan(ema20_result[-1]) else current_price
-                long_term_ema_50 = float(ema50_result[-1]) if len(ema50_result) > 0 and not np.isnan(ema50_result[-1]) else current_price
-
-                # Calculate ATR using ta-lib
-                atr3_result = talib.ATR(highs_np, lows_np, prices_np, timeperiod=3)
-                atr14_result = talib.ATR(highs_np, lows_np, prices_np, timeperiod=14)
-
-                atr_3_period = float(atr3_result[-1]) if len(atr3_result) > 0 and not np.isnan(atr3_result[-1]) else current_price * 0.01
-                atr_14_period = float(atr14_result[-1]) if len(atr14_result) > 0 and not np.isnan(atr14_result[-1]) else current_price * 0.02
+                # Calculate EMAs using the ta-lib stream API - these are only
+                # needed as scalars, so skip allocating full output arrays
+                long_term_ema_20 = float(talib.stream.EMA(prices_np, timeperiod=20))
+                long_term_ema_50 = float(talib.stream.EMA(prices_np, timeperiod=50))
+                if np.isnan(long_term_ema_20):
+                    long_term_ema_20 = current_price
+                if np.isnan(long_term_ema_50):
+                    long_term_ema_50 = current_price
+
+                # Calculate ATR using the ta-lib stream API (scalars only)
+                atr_3_period = float(talib.stream.ATR(highs_np, lows_np, prices_np, timeperiod=3))
+                atr_14_period = float(talib.stream.ATR(highs_np, lows_np, prices_np, timeperiod=14))
+                if np.isnan(atr_3_period):
+                    atr_3_period = current_price * 0.01
+                if np.isnan(atr_14_period):
+                    atr_14_period = current_price * 0.02
 
                 logger.info(f"DEBUG: ta-lib calculations for {symbol}: EMA20={long_term_ema_20}, EMA50={long_term_ema_50}, ATR3={atr_3_period}, ATR14={atr_14_period}")
 
-                # Calculate longer-term MACD and RSI series from 4-hour data using talib
-                macd_4h_result, macd_4h_signal, macd_4h_hist = talib.MACD(prices_np, fastperiod=12, slowperiod=26, signalperiod=9)
-                long_macd_series = [float(x) if not np.isnan(x) else 0 for x in macd_4h_result]
-
-                rsi_4h_result = talib.RSI(prices_np, timeperiod=14)
-                long_rsi_14_series = [float(x) if not np.isnan(x) else 50.0 for x in rsi_4h_result]
-
-                # Calculate volume data from 4-hour data
-                current_volume = kline_4h_volumes[-1] if kline_4h_volumes else current_price * 1000
-                avg_volume = sum(kline_4h_volumes[-14:]) / len(kline_4h_volumes[-14:]) if len(kline_4h_volumes) >= 14 else sum(kline_4h_volumes) / len(kline_4h_volumes) if kline_4h_volumes else current_price * 1000
+                # Calculate longer-term MACD and RSI series from 4-hour data using
+                # talib. TA-Lib releases the GIL, so dispatch the two 200-bar
+                # computations to threads and overlap them instead of blocking
+                # the event loop serially.
+                (macd_4h_result, macd_4h_signal, macd_4h_hist), rsi_4h_result = await asyncio.gather(
+                    asyncio.to_thread(talib.MACD, prices_np, fastperiod=12, slowperiod=26, signalperiod=9),
+                    asyncio.to_thread(talib.RSI, prices_np, timeperiod=14)
+                )
+                long_macd_series = np.nan_to_num(macd_4h_result[-10:]).tolist()
 
-                # Calculate longer-term MACD series from 4-hour data
-                long_macd_series = [calculate_simple_macd(kline_4h_prices[:i+1])[0] if i >= 25 else 0 for i in range(len(kline_4h_prices))]
+                rsi_4h_tail = rsi_4h_result[-10:]
+                long_rsi_14_series = np.where(np.isnan(rsi_4h_tail), 50.0, rsi_4h_tail).tolist()
 
-                # Calculate longer-term RSI 14 series from 4-hour data
-                long_rsi_14_series = [calculate_rsi(kline_4h_prices[:i+1], 14) if i >= 13 else 50.0 for i in range(len(kline_4h_prices))]
+                # Calculate volume data from 4-hour data (vectorized mean over
+                # the last 14 bars, or whatever is available)
+                volumes_np = np.asarray(kline_4h_volumes, dtype=np.float64)
+                current_volume = float(volumes_np[-1]) if volumes_np.size else current_price * 1000
+                avg_volume = float(volumes_np[-14:].mean()) if volumes_np.size else current_price * 1000
 
                 # For the intraday prices, keep only the last 10 values
                 intraday_prices = kline_prices[-10:] if len(kline_prices) >= 10 else kline_prices
 
-                # Keep only the last 10 values for each series
-                ema_20_series = ema_20_series[-10:] if len(ema_20_series) >= 10 else ema_20_series
-                macd_value_series = macd_value_series[-10:] if len(macd_value_series) >= 10 else macd_value_series
-                macd_signal_series = macd_signal_series[-10:] if len(macd_signal_series) >= 10 else macd_signal_series
-                rsi_7_series = rsi_7_series[-10:] if len(rsi_7_series) >= 10 else rsi_7_series
-                rsi_14_series = rsi_14_series[-10:] if len(rsi_14_series) >= 10 else rsi_14_series
-
-                # Keep only the last 10 values for longer-term series
-                long_macd_series = long_macd_series[-10:] if len(long_macd_series) >= 10 else long_macd_series
-                long_rsi_14_series = long_rsi_14_series[-10:] if len(long_rsi_14_series) >= 10 else long_rsi_14_series
-
                 # Process liquidation orders to get biggest 10 buy and sell orders
-                buy_orders = []
-                sell_orders = []
-
-                if "rows" in liquidation_orders and liquidation_orders["rows"]:
-                    for order in liquidation_orders["rows"]:
-                        # Filter out orders older than 24 hours (86400000 milliseconds)
-                        order_time = int(order.get("time", 0))
-                        current_time = int(datetime.now().timestamp() * 1000)
-
-                        if current_time - order_time <= 86400000:  # Within 24 hours
-                            order_info = {
-                                "price": float(order.get("price", 0)),
-                                "qty": float(order.get("qty", 0)),
-                                "side": order.get("side", ""),
-                                "symbol": order.get("symbol", "")
-                            }
-
-                            if order_info["side"] == "BUY":
-                                buy_orders.append(order_info)
-                            elif order_info["side"] == "SELL":
-                                sell_orders.append(order_info)
-
-                # Sort by quantity (largest first) and take top 10
-                buy_orders.sort(key=lambda x: x["qty"], reverse=True)
-                sell_orders.sort(key=lambda x: x["qty"], reverse=True)
-
-                top_10_buy_orders = buy_orders[:10] if buy_orders else []
-                top_10_sell_orders = sell_orders[:10] if sell_orders else []
-
-                # Add coin data to market state
-                coin_data = [
-                    f"ALL {coin} DATA",
-                    f"current_price = {current_price}, current_ema20 = {current_ema20}, current_macd = {current_macd[0]}, current_rsi (7 period) = {current_rsi}",
-                    f"",
-                    f"In addition, here is the latest {coin} open interest and funding rate for perps (the instrument you are trading):",
-                    f"",
-                    f"Open Interest: Latest: {open_interest.get('openInterest', '0.0')} Average: {open_interest.get('openInterest', '0.0')}",  # Placeholder for average
-                    f"",
-                    f"Funding Rate: {funding_rate}",  # Real funding rate from API
-                    f"",
-                    f"Intraday series (by {'5-minute' if self.simulation_mode else '3-minute'} intervals, oldest → latest):",
-                    f"",
-                    f"Mid prices: {intraday_prices}",
-                    f"EMA indicators (20‑period): {ema_20_series}",
-                    f"MACD value indicators: {macd_value_series}",
-                    f"MACD signal indicators: {macd_signal_series}",
-                    f"RSI indicators (7‑Period): {rsi_7_series}",
-                    f"RSI indicators (14‑Period): {rsi_14_series}",
-                    f"",
-                    f"Liquidation Orders (Biggest 10 Buy/Sell in past 24h):",
-                    f"",
-                    f"Top 10 Buy Liquidations:",
-                ]
-
-                # Add top 10 buy orders
-                if top_10_buy_orders:
-                    for i, order in enumerate(top_10_buy_orders, 1):
-                        coin_data.append(f"  {i}. Price: {order['price']:.2f}, Quantity: {order['qty']:.6f}")
-                else:
-                    coin_data.append(f"  No significant buy liquidations in past 24h")
-
-                coin_data.extend([
-                    f"",
-                    f"Top 10 Sell Liquidations:",
-                ])
-
-                # Add top 10 sell orders
-                if top_10_sell_orders:
-                    for i, order in enumerate(top_10_sell_orders, 1):
-                        coin_data.append(f"  {i}. Price: {order['price']:.2f}, Quantity: {order['qty']:.6f}")
-                else:
-                    coin_data.append(f"  No significant sell liquidations in past 24h")
-
-                coin_data.extend([
-                    f"",
-                    f"Longer‑term context (4‑hour timeframe):",
-                    f"",
-                    f"20‑Period EMA: {long_term_ema_20} vs. 50‑Period EMA: {long_term_ema_50}",
-                    f"3‑Period ATR: {atr_3_period} vs. 14‑Period ATR: {atr_14_period}",
-                    f"Current Volume: {current_volume} vs. Average Volume: {avg_volume}",  # Placeholder values
-                    f"MACD indicators: {long_macd_series}",
-                    f"RSI indicators (14‑Period): {long_rsi_14_series}",
-                    f""
-                ])
-
-                market_state_parts.extend(coin_data)
+                top_10_buy_orders = []
+                top_10_sell_orders = []
+
+                rows = liquidation_orders.get("rows") or []
+                if rows:
+                    # Build one structured array and filter/split it at C level
+                    # instead of per-row Python dicts, casts and branches
+                    recs = np.fromiter(
+                        ((float(o.get("price", 0)), float(o.get("qty", 0)), o.get("side", ""), o.get("symbol", ""), int(o.get("time", 0))) for o in rows),
+                        dtype=_LIQUIDATION_DTYPE, count=len(rows)
+                    )
+
+                    # Filter out orders older than 24 hours (86400000 milliseconds)
+                    cutoff = int(datetime.now().timestamp() * 1000) - 86400000
+                    recs = recs[recs['time'] >= cutoff]
+
+                    top_10_buy_orders = _top_liquidations(recs[recs['side'] == "BUY"])
+                    top_10_sell_orders = _top_liquidations(recs[recs['side'] == "SELL"])
+
+                # Add coin data to market state via the precompiled template
+                market_state_parts.append(self._COIN_TEMPLATE.format(
+                    coin=coin,
+                    mode_suffix="",
+                    current_price=current_price,
+                    current_ema20=current_ema20,
+                    current_macd=current_macd[0],
+                    current_rsi=current_rsi,
+                    open_interest=open_interest.get('openInterest', '0.0'),  # Placeholder for average
+                    funding_rate=funding_rate,  # Real funding rate from API
+                    intraday_header=f"Intraday series (by {'5-minute' if self.simulation_mode else '3-minute'} intervals, oldest → latest):",
+                    intraday_prices=intraday_prices,
+                    ema_20_series=ema_20_series,
+                    macd_value_series=macd_value_series,
+                    macd_signal_series=macd_signal_series,
+                    rsi_7_series=rsi_7_series,
+                    rsi_14_series=rsi_14_series,
+                    buy_liquidations=self._format_liquidation_lines(top_10_buy_orders, "buy"),
+                    sell_liquidations=self._format_liquidation_lines(top_10_sell_orders, "sell"),
+                    long_term_ema_20=long_term_ema_20,
+                    long_term_ema_50=long_term_ema_50,
+                    atr_3_period=atr_3_period,
+                    atr_14_period=atr_14_period,
+                    current_volume=current_volume,  # Placeholder values
+                    avg_volume=avg_volume,
+                    long_macd_series=long_macd_series,
+                    long_rsi_14_series=long_rsi_14_series
+                ))
 
                 # Store detailed coin data for XML update
                 all_coin_data[coin.lower()] = {
@@ -669,14 +904,14 @@ class MarketCoordinator:
                     "long_rsi_14_series": long_rsi_14_series,
                     "top_10_buy_liquidations": top_10_buy_orders,
                     "top_10_sell_liquidations": top_10_sell_orders,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": tick_iso
                 }
 
             # Get real account information from XML
-            account_summary = self.xml_manager.get_account_summary()
+            account_summary = self._tick_cached("account_summary", self.xml_manager.get_account_summary)
 
             # Get active trades for positions info
-            active_trades = self.trade_xml_manager.get_active_trades()
+            active_trades = self._tick_cached("active_trades", self.trade_xml_manager.get_active_trades)
 
             # Update unrealized PNL for active trades and persist to XML
             await self._update_active_trades_pnl(active_trades, all_coin_data)
@@ -687,126 +922,133 @@ class MarketCoordinator:
                 f"Current Total Return (percent): {account_summary.get('total_return', 0.0)}%",
                 f"Available Cash: {account_summary.get('available_cash', 10000.0)}",
                 f"Current Account Value: {account_summary.get('current_account_value', 10000.0)}",
-                f"Current live positions & performance: {json.dumps(active_trades, default=str)}",
+                f"Current live positions & performance: {self._active_trades_json(active_trades)}",
                 f"Sharpe Ratio: {account_summary.get('sharpe_ratio', 0.0)}"
             ]
 
             market_state_parts.extend(account_info)
-            market_state_parts.append("---END OF USER PROMPT---")
+            market_state_parts.append(self._PROMPT_FOOTER)
 
             # Update the state_of_market in XML
             await self._update_state_of_market(all_coin_data)
 
             # Save the user prompt to file immediately after generation
             user_prompt_text = "\n".join(market_state_parts)
-            self._save_user_prompt_to_file(user_prompt_text)
+            await self._save_user_prompt_to_file(user_prompt_text)
 
             return user_prompt_text
 
+    # Child tags of a <coin> element in document order (after <name>)
+    _COIN_CHILD_ORDER = (
+        "current_price", "current_ema20", "current_macd_value", "current_macd_signal",
+        "current_rsi", "open_interest_latest", "open_interest_avg", "funding_rate",
+        "intraday_prices", "ema_20_series", "macd_value_series", "macd_signal_series",
+        "rsi_7_series", "rsi_14_series",
+        "long_term_ema_20", "long_term_ema_50", "atr_3_period", "atr_14_period",
+        "current_volume", "avg_volume",
+        "long_macd_series", "long_rsi_14_series",
+        "top_10_buy_liquidations", "top_10_sell_liquidations",
+        "timestamp"
+    )
+
+    # Tags holding a list of <value> children
+    _COIN_SERIES_TAGS = (
+        "intraday_prices", "ema_20_series", "macd_value_series", "macd_signal_series",
+        "rsi_7_series", "rsi_14_series", "long_macd_series", "long_rsi_14_series"
+    )
+
+    def _ensure_coin_elements(self, state_of_market, coin: str) -> Dict[str, ET.Element]:
+        """Find or create the <coin> element and cache a tag -> Element map"""
+        coin_elem = None
+        for existing_coin in state_of_market.findall("coin"):
+            name_elem = existing_coin.find("name")
+            if name_elem is not None and name_elem.text == coin:
+                coin_elem = existing_coin
+                break
+
+        if coin_elem is None:
+            coin_elem = ET.SubElement(state_of_market, "coin")
+            ET.SubElement(coin_elem, "name").text = coin
+
+        elems = {}
+        for tag in self._COIN_CHILD_ORDER:
+            child = coin_elem.find(tag)
+            if child is None:
+                child = ET.SubElement(coin_elem, tag)
+            elems[tag] = child
+
+        self._coin_elem_cache[coin] = elems
+        return elems
+
+    @staticmethod
+    def _set_series_values(series_elem, values):
+        """Store the series as one space-separated text payload.
+
+        A single text assignment replaces ~10 <value> Element allocations per
+        series per tick and shrinks the serialized document; readers split on
+        whitespace (and still accept the legacy <value> children).
+        """
+        for child in list(series_elem):
+            series_elem.remove(child)
+        series_elem.text = " ".join(f"{v:.6g}" for v in values)
+
+    @staticmethod
+    def _set_liquidation_orders(liq_elem: ET.Element, orders):
+        """Replace the <order> children with the given liquidation orders"""
+        for child in list(liq_elem):
+            liq_elem.remove(child)
+        for order in orders:
+            order_elem = ET.SubElement(liq_elem, "order")
+            ET.SubElement(order_elem, "price").text = str(order["price"])
+            ET.SubElement(order_elem, "qty").text = str(order["qty"])
+            ET.SubElement(order_elem, "side").text = order["side"]
+            ET.SubElement(order_elem, "symbol").text = order["symbol"]
+
     async def _update_state_of_market(self, all_coin_data: Dict[str, Dict]):
-        """Update the state_of_market section in the XML file"""
+        """Update the state_of_market section by patching element text in place.
+
+        The elements for each coin are created once and cached; subsequent
+        ticks are a fixed set of .text assignments instead of clearing and
+        reallocating the whole subtree.
+        """
         # Get the state_of_market section via the shared manager
-        state_of_market = self.xml_manager.get_state_of_market_section()
+        state_of_market = self._tick_cached("state_of_market", self.xml_manager.get_state_of_market_section)
 
         # Update existing coin data or add new coins without clearing the section
         for coin in self.coins:
             coin_lower = coin.lower()
-            if coin_lower in all_coin_data:
-                coin_data = all_coin_data[coin_lower]
-
-                # Find existing coin element or create new one
-                coin_elem = None
-                for existing_coin in state_of_market.findall("coin"):
-                    if existing_coin.find("name") is not None and existing_coin.find("name").text == coin:
-                        coin_elem = existing_coin
-                        break
-
-                if coin_elem is None:
-                    coin_elem = ET.SubElement(state_of_market, "coin")
-                    ET.SubElement(coin_elem, "name").text = coin
-
-                # Clear existing subelements and add updated data
-                for child in list(coin_elem):
-                    coin_elem.remove(child)
-
-                # Re-add name
-                ET.SubElement(coin_elem, "name").text = coin
-
-                # Add each piece of data as a separate XML element instead of JSON
-                ET.SubElement(coin_elem, "current_price").text = str(coin_data["current_price"])
-                ET.SubElement(coin_elem, "current_ema20").text = str(coin_data["current_ema20"])
-                ET.SubElement(coin_elem, "current_macd_value").text = str(coin_data["current_macd"][0])
-                ET.SubElement(coin_elem, "current_macd_signal").text = str(coin_data["current_macd"][1])
-                ET.SubElement(coin_elem, "current_rsi").text = str(coin_data["current_rsi"])
-                ET.SubElement(coin_elem, "open_interest_latest").text = str(coin_data["open_interest_latest"])
-                ET.SubElement(coin_elem, "open_interest_avg").text = str(coin_data["open_interest_avg"])
-                ET.SubElement(coin_elem, "funding_rate").text = str(coin_data["funding_rate"])
-
-                # Intraday prices
-                intraday_prices_elem = ET.SubElement(coin_elem, "intraday_prices")
-                for price in coin_data["intraday_prices"]:
-                    ET.SubElement(intraday_prices_elem, "value").text = str(price)
-
-                # Intraday series
-                ema_20_series_elem = ET.SubElement(coin_elem, "ema_20_series")
-                for price in coin_data["ema_20_series"]:
-                    ET.SubElement(ema_20_series_elem, "value").text = str(price)
-
-                macd_value_series_elem = ET.SubElement(coin_elem, "macd_value_series")
-                for value in coin_data["macd_value_series"]:
-                    ET.SubElement(macd_value_series_elem, "value").text = str(value)
-
-                macd_signal_series_elem = ET.SubElement(coin_elem, "macd_signal_series")
-                for value in coin_data["macd_signal_series"]:
-                    ET.SubElement(macd_signal_series_elem, "value").text = str(value)
-
-                rsi_7_series_elem = ET.SubElement(coin_elem, "rsi_7_series")
-                for value in coin_data["rsi_7_series"]:
-                    ET.SubElement(rsi_7_series_elem, "value").text = str(value)
-
-                rsi_14_series_elem = ET.SubElement(coin_elem, "rsi_14_series")
-                for value in coin_data["rsi_14_series"]:
-                    ET.SubElement(rsi_14_series_elem, "value").text = str(value)
-
-                # Longer-term indicators
-                ET.SubElement(coin_elem, "long_term_ema_20").text = str(coin_data["long_term_ema_20"])
-                ET.SubElement(coin_elem, "long_term_ema_50").text = str(coin_data["long_term_ema_50"])
-                ET.SubElement(coin_elem, "atr_3_period").text = str(coin_data["atr_3_period"])
-                ET.SubElement(coin_elem, "atr_14_period").text = str(coin_data["atr_14_period"])
-                ET.SubElement(coin_elem, "current_volume").text = str(coin_data["current_volume"])
-                ET.SubElement(coin_elem, "avg_volume").text = str(coin_data["avg_volume"])
-
-                # Longer-term series
-                long_macd_series_elem = ET.SubElement(coin_elem, "long_macd_series")
-                for value in coin_data["long_macd_series"]:
-                    ET.SubElement(long_macd_series_elem, "value").text = str(value)
-
-                long_rsi_14_series_elem = ET.SubElement(coin_elem, "long_rsi_14_series")
-                for value in coin_data["long_rsi_14_series"]:
-                    ET.SubElement(long_rsi_14_series_elem, "value").text = str(value)
-
-                # Top 10 buy liquidation orders
-                top_10_buy_liquidations_elem = ET.SubElement(coin_elem, "top_10_buy_liquidations")
-                for order in coin_data["top_10_buy_liquidations"]:
-                    order_elem = ET.SubElement(top_10_buy_liquidations_elem, "order")
-                    ET.SubElement(order_elem, "price").text = str(order["price"])
-                    ET.SubElement(order_elem, "qty").text = str(order["qty"])
-                    ET.SubElement(order_elem, "side").text = order["side"]
-                    ET.SubElement(order_elem, "symbol").text = order["symbol"]
-
-                # Top 10 sell liquidation orders
-                top_10_sell_liquidations_elem = ET.SubElement(coin_elem, "top_10_sell_liquidations")
-                for order in coin_data["top_10_sell_liquidations"]:
-                    order_elem = ET.SubElement(top_10_sell_liquidations_elem, "order")
-                    ET.SubElement(order_elem, "price").text = str(order["price"])
-                    ET.SubElement(order_elem, "qty").text = str(order["qty"])
-                    ET.SubElement(order_elem, "side").text = order["side"]
-                    ET.SubElement(order_elem, "symbol").text = order["symbol"]
-
-                ET.SubElement(coin_elem, "timestamp").text = coin_data["timestamp"]
-
-        # Write to the XML file via shared manager
-        self.xml_manager._write_xml()
+            if coin_lower not in all_coin_data:
+                continue
+            coin_data = all_coin_data[coin_lower]
+
+            elems = self._coin_elem_cache.get(coin)
+            if elems is None:
+                elems = self._ensure_coin_elements(state_of_market, coin)
+
+            elems["current_price"].text = str(coin_data["current_price"])
+            elems["current_ema20"].text = str(coin_data["current_ema20"])
+            elems["current_macd_value"].text = str(coin_data["current_macd"][0])
+            elems["current_macd_signal"].text = str(coin_data["current_macd"][1])
+            elems["current_rsi"].text = str(coin_data["current_rsi"])
+            elems["open_interest_latest"].text = str(coin_data["open_interest_latest"])
+            elems["open_interest_avg"].text = str(coin_data["open_interest_avg"])
+            elems["funding_rate"].text = str(coin_data["funding_rate"])
+            elems["long_term_ema_20"].text = str(coin_data["long_term_ema_20"])
+            elems["long_term_ema_50"].text = str(coin_data["long_term_ema_50"])
+            elems["atr_3_period"].text = str(coin_data["atr_3_period"])
+            elems["atr_14_period"].text = str(coin_data["atr_14_period"])
+            elems["current_volume"].text = str(coin_data["current_volume"])
+            elems["avg_volume"].text = str(coin_data["avg_volume"])
+            elems["timestamp"].text = coin_data["timestamp"]
+
+            for tag in self._COIN_SERIES_TAGS:
+                self._set_series_values(elems[tag], coin_data[tag])
+
+            self._set_liquidation_orders(elems["top_10_buy_liquidations"], coin_data["top_10_buy_liquidations"])
+            self._set_liquidation_orders(elems["top_10_sell_liquidations"], coin_data["top_10_sell_liquidations"])
+
+        # Flushed to disk once per cycle instead of per update
+        self._xml_dirty = True
     
     async def run_market_updates(self, trading_agents):
         """Run continuous market updates (to be called every minute)"""
@@ -821,9 +1063,21 @@ class MarketCoordinator:
         except Exception as e:
             logger.info(f"Failed to start liquidation collection: {e}")
 
+        # Live mode decouples agents from the prep cadence: each agent
+        # consumes prompts from its own single-slot queue at its own pace, so
+        # one slow LLM call no longer stalls the next market-state fetch.
+        # Simulation keeps the synchronous gather so the historical replay
+        # stays deterministic.
+        prompt_queues = []
+        if not self.simulation_mode:
+            for agent in trading_agents:
+                queue = asyncio.Queue(maxsize=1)
+                prompt_queues.append(queue)
+                asyncio.create_task(self._run_agent_consumer(agent, queue))
+
         while True:
             try:
-                # Prepare the market state
+                # Prepare the market state (this also resets the per-tick memo)
                 user_prompt = await self.prepare_market_state()
 
                 if self.simulation_mode:
@@ -831,8 +1085,22 @@ class MarketCoordinator:
                 else:
                     logger.info(f"Market state prepared at {datetime.now()}")
 
-                # Pass the market data to all trading agents in parallel
-                await asyncio.gather(*[agent.process_user_prompt(user_prompt) for agent in trading_agents])
+                # Pass the market data to all trading agents
+                if self.simulation_mode:
+                    await asyncio.gather(*[agent.process_user_prompt(user_prompt) for agent in trading_agents])
+                else:
+                    for queue in prompt_queues:
+                        if queue.full():
+                            # Agent is still busy: drop the stale prompt so it
+                            # always picks up the freshest market state
+                            queue.get_nowait()
+                        queue.put_nowait(user_prompt)
+
+                # Flush any buffered XML mutations once per cycle, off the
+                # event loop so serialization doesn't block market updates
+                if self._xml_dirty:
+                    await asyncio.to_thread(self.xml_manager._write_xml)
+                    self._xml_dirty = False
 
                 # No wait for simulation - continuous replay of historical data
                 # Wait for live trading only
@@ -848,6 +1116,141 @@ class MarketCoordinator:
                     logger.info("Detected undefined variable error - this should be fixed in Agent.py")
                 await asyncio.sleep(60)  # Wait before retrying
 
+    async def _run_agent_consumer(self, agent, queue: asyncio.Queue):
+        """Feed one agent from its prompt queue, isolating its failures"""
+        while True:
+            user_prompt = await queue.get()
+            try:
+                await agent.process_user_prompt(user_prompt)
+            except Exception as e:
+                logger.info(f"Error processing prompt for agent {getattr(agent, 'kind', agent)}: {e}")
+                traceback.print_exc()
+
+    def _seed_indicator_states(self, pending: List[tuple]):
+        """Seed streaming state for several coins, sharing one compiled call.
+
+        pending holds (coin, closes, highs, lows, last_time) tuples. When the
+        windows line up (the common case: every coin reseeds on the first
+        tick with the same 50-bar span), the inputs are stacked and the
+        parallel batch kernel computes all coins at once; ragged windows fall
+        back to per-coin calls.
+        """
+        lengths = {len(item[1]) for item in pending}
+        if len(pending) > 1 and len(lengths) == 1:
+            prices2d = np.asarray([item[1] for item in pending], dtype=float)
+            highs2d = np.asarray([item[2] for item in pending], dtype=float)
+            lows2d = np.asarray([item[3] for item in pending], dtype=float)
+            batch = batch_all_indicators(prices2d, highs2d, lows2d)
+            for i, (coin, closes, highs, lows, last_time) in enumerate(pending):
+                results = tuple(out[i] for out in batch)
+                self._indicator_state[coin] = self._seed_indicator_state(closes, highs, lows, last_time, results)
+        else:
+            for coin, closes, highs, lows, last_time in pending:
+                self._indicator_state[coin] = self._seed_indicator_state(closes, highs, lows, last_time)
+
+    def _seed_indicator_state(self, closes: List[float], highs: List[float], lows: List[float], last_time: int, results: tuple = None) -> Dict:
+        """Seed streaming indicator state for a coin with one full batch pass.
+
+        Called on the first simulation tick for a coin and whenever a gap in
+        the kline sequence is detected; contiguous bars are then folded in
+        incrementally by _update_indicator_state. results, when given, carries
+        precomputed compute_all_indicators output from the batch kernel.
+        """
+        prices_np = np.asarray(closes, dtype=float)
+        highs_np = np.asarray(highs, dtype=float)
+        lows_np = np.asarray(lows, dtype=float)
+        current_price = float(prices_np[-1])
+
+        # One compiled call computes every series the seed needs
+        if results is None:
+            results = compute_all_indicators(prices_np, highs_np, lows_np)
+        (ema20_result, ema50_result, ema12_result, ema26_result,
+         macd_result, macd_signal, rsi_7_result, rsi_14_result,
+         atr3_result, atr14_result) = results
+
+        def _scalar(arr, fallback):
+            return float(arr[-1]) if len(arr) > 0 and not np.isnan(arr[-1]) else fallback
+
+        # Wilder average gain/loss backing the incremental RSI updates
+        deltas = np.diff(prices_np)
+        gains = np.where(deltas > 0, deltas, 0.0)
+        losses = np.where(deltas < 0, -deltas, 0.0)
+
+        def _wilder_avg(values, period):
+            if len(values) == 0:
+                return 0.0
+            if len(values) <= period:
+                return float(values.mean())
+            avg = float(values[:period].mean())
+            for v in values[period:]:
+                avg = (avg * (period - 1) + v) / period
+            return avg
+
+        state = {
+            "last_time": last_time,
+            "prev_close": current_price,
+            "ema20": _scalar(ema20_result, current_price),
+            "ema50": _scalar(ema50_result, current_price),
+            "macd_fast": _scalar(ema12_result, current_price),
+            "macd_slow": _scalar(ema26_result, current_price),
+            "macd_value": _scalar(macd_result, 0.0),
+            "macd_signal": _scalar(macd_signal, 0.0),
+            "rsi7_avg_gain": _wilder_avg(gains, 7),
+            "rsi7_avg_loss": _wilder_avg(losses, 7),
+            "rsi14_avg_gain": _wilder_avg(gains, 14),
+            "rsi14_avg_loss": _wilder_avg(losses, 14),
+            "atr3": _scalar(atr3_result, current_price * 0.01),
+            "atr14": _scalar(atr14_result, current_price * 0.02),
+        }
+
+        # Ring buffers for the 10-value series so the old [-10:] slices become O(1)
+        ema_tail = ema20_result[-10:]
+        state["prices"] = deque(prices_np[-10:].tolist(), maxlen=10)
+        state["ema_20_series"] = deque(np.where(np.isnan(ema_tail), prices_np[-len(ema_tail):], ema_tail).tolist(), maxlen=10)
+        state["macd_value_series"] = deque(np.nan_to_num(macd_result[-10:]).tolist(), maxlen=10)
+        state["macd_signal_series"] = deque(np.nan_to_num(macd_signal[-10:]).tolist(), maxlen=10)
+        rsi_tail = rsi_7_result[-10:]
+        state["rsi_7_series"] = deque(np.where(np.isnan(rsi_tail), 50.0, rsi_tail).tolist(), maxlen=10)
+        rsi_14_tail = rsi_14_result[-10:]
+        state["rsi_14_series"] = deque(np.where(np.isnan(rsi_14_tail), 50.0, rsi_14_tail).tolist(), maxlen=10)
+
+        return state
+
+    def _update_indicator_state(self, state: Dict, close: float, high: float, low: float, bar_time: int):
+        """Fold one new kline into the streaming indicator state in O(1)"""
+        prev_close = state["prev_close"]
+
+        state["ema20"] = _ema_update(state["ema20"], close, 20)
+        state["ema50"] = _ema_update(state["ema50"], close, 50)
+
+        state["macd_fast"] = _ema_update(state["macd_fast"], close, 12)
+        state["macd_slow"] = _ema_update(state["macd_slow"], close, 26)
+        state["macd_value"] = state["macd_fast"] - state["macd_slow"]
+        state["macd_signal"] = _ema_update(state["macd_signal"], state["macd_value"], 9)
+
+        # Wilder's smoothing for RSI
+        gain = max(close - prev_close, 0.0)
+        loss = max(prev_close - close, 0.0)
+        state["rsi7_avg_gain"] = (state["rsi7_avg_gain"] * 6 + gain) / 7
+        state["rsi7_avg_loss"] = (state["rsi7_avg_loss"] * 6 + loss) / 7
+        state["rsi14_avg_gain"] = (state["rsi14_avg_gain"] * 13 + gain) / 14
+        state["rsi14_avg_loss"] = (state["rsi14_avg_loss"] * 13 + loss) / 14
+
+        # Wilder's smoothing for ATR
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        state["atr3"] = (state["atr3"] * 2 + tr) / 3
+        state["atr14"] = (state["atr14"] * 13 + tr) / 14
+
+        state["prev_close"] = close
+        state["last_time"] = bar_time
+
+        state["prices"].append(close)
+        state["ema_20_series"].append(state["ema20"])
+        state["macd_value_series"].append(state["macd_value"])
+        state["macd_signal_series"].append(state["macd_signal"])
+        state["rsi_7_series"].append(_rsi_from_avgs(state["rsi7_avg_gain"], state["rsi7_avg_loss"]))
+        state["rsi_14_series"].append(_rsi_from_avgs(state["rsi14_avg_gain"], state["rsi14_avg_loss"]))
+
     async def _prepare_simulation_market_state(self) -> str:
         """Prepare market state using historical data from Redis for simulation mode"""
         logger.info("Preparing simulation market state from Redis...")
@@ -862,29 +1265,73 @@ class MarketCoordinator:
         invocations = minutes_since_start  # Each 5-minute interval is one invocation
 
         market_state_parts = [
-            f"USER_PROMPT (SIMULATION MODE)",
-            f"It has been {minutes_since_start} minutes since you started trading. The current simulation time is {datetime.fromtimestamp(self.simulation_timestamp)} and you've been invoked {invocations} times. Below, we are providing you with a variety of state data, price data, and predictive signals so you can discover alpha. Below that is your current account information, value, performance, positions, etc.",
-            f"",
-            f"ALL OF THE PRICE OR SIGNAL DATA BELOW IS ORDERED: OLDEST → NEWEST",
-            f"",
-            f"Timeframes note: Unless stated otherwise in a section title, intraday series are provided at 5‑minute intervals for simulation. If a coin uses a different interval, it is explicitly stated in that coin's section.",
-            f"",
-            f"CURRENT MARKET STATE FOR ALL COINS (SIMULATION)"
+            self._SIM_PROMPT_PREFIX_TEMPLATE.format(
+                minutes=minutes_since_start,
+                now=datetime.fromtimestamp(self.simulation_timestamp),
+                invocations=invocations
+            )
         ]
 
         all_coin_data = {}
 
-        # Fetch data for each coin from Redis
+        # Get historical klines from Redis (simulate current market state)
+        # Get the last 10 data points (50 for calculations like live mode) around the current simulation timestamp
+        window_seconds = 50 * 5 * 60  # 50 points * 5 min * 60 sec = 15000 seconds
+        start_ts = int(max(0, self.simulation_timestamp - window_seconds))
+        end_ts = int(self.simulation_timestamp)
+
+        # Batch the Redis fetches: one MGET covers every coin's kline window
+        # and one pipeline covers every coin's OI tail, so the per-tick cost
+        # is two round trips instead of two per coin. 49 of the 50 OI points
+        # are unchanged between ticks, so only entries newer than the rolling
+        # buffer are requested.
+        oi_ranges = {}
         for coin in self.coins:
-            # Get historical klines from Redis (simulate current market state)
-            # Get the last 10 data points (50 for calculations like live mode) around the current simulation timestamp
-            window_seconds = 50 * 5 * 60  # 50 points * 5 min * 60 sec = 15000 seconds
-            start_ts = int(max(0, self.simulation_timestamp - window_seconds))
-            end_ts = int(self.simulation_timestamp)
+            oi_buffer = self._oi_buffer.get(coin)
+            oi_start = int(oi_buffer[-1]["time"]) + 1 if oi_buffer else start_ts
+            oi_ranges[self._futures_symbols[coin]] = (oi_start, end_ts)
 
-            symbol = f"{coin}USDT"  # Use USDT symbol format for Redis
-            cached_klines = await get_cached_klines_individual_range(symbol, "5m", start_ts, end_ts)
+        klines_by_symbol, oi_by_symbol = await asyncio.gather(
+            get_cached_klines_batch([self._futures_symbols[coin] for coin in self.coins], "5m", start_ts, end_ts),
+            get_cached_open_interest_batch(oi_ranges, "5m")
+        )
 
+        fetched = []
+        for coin in self.coins:
+            symbol = self._futures_symbols[coin]  # Use USDT symbol format for Redis
+            oi_buffer = self._oi_buffer.get(coin)
+            if oi_buffer is None:
+                oi_buffer = deque(maxlen=50)
+                self._oi_buffer[coin] = oi_buffer
+            oi_buffer.extend(oi_by_symbol.get(symbol, []))
+            fetched.append((coin, klines_by_symbol.get(symbol, []), list(oi_buffer)))
+
+        # Advance the streaming indicator state first: contiguous new bars
+        # are folded in incrementally in O(1), while first-tick coins (or
+        # gaps in the kline sequence) are collected and reseeded together in
+        # one parallel batch pass
+        pending_seeds = []
+        for coin, cached_klines, _ in fetched:
+            if not cached_klines:
+                continue
+            current_kline = cached_klines[-1]
+            last_kline_time = int(current_kline.get('time', self.simulation_timestamp))
+            state = self._indicator_state.get(coin)
+            if state is not None and last_kline_time == state["last_time"] + 300:
+                self._update_indicator_state(state, current_kline['close'], current_kline['high'], current_kline['low'], last_kline_time)
+            elif state is None or last_kline_time != state["last_time"]:
+                rec = np.fromiter(
+                    ((k['close'], k['high'], k['low']) for k in cached_klines),
+                    dtype=_KLINE_SEED_DTYPE, count=len(cached_klines)
+                )
+                pending_seeds.append((coin, rec['close'], rec['high'], rec['low'], last_kline_time))
+        if pending_seeds:
+            self._seed_indicator_states(pending_seeds)
+
+        # Assemble the market state in a second synchronous pass to preserve
+        # the coin ordering in the prompt
+        tick_iso = datetime.fromtimestamp(self.simulation_timestamp).isoformat()
+        for coin, cached_klines, open_interest_data in fetched:
             # Use the most recent kline as "current" price
             current_kline = cached_klines[-1] if cached_klines else None
             if not current_kline:
@@ -892,21 +1339,11 @@ class MarketCoordinator:
 
             current_price = current_kline['close']
 
-            # Extract price data for indicators
-            kline_prices = [k['close'] for k in cached_klines]
-            kline_highs = [k['high'] for k in cached_klines]
-            kline_lows = [k['low'] for k in cached_klines]
-            kline_volumes = [k['vol'] for k in cached_klines]
-
-            # Get longer term data (simulate 4h data using 5m data aggregated)
-            # For simulation, we'll use the same data but treat it as 4h equivalent
-            kline_4h_prices = kline_prices
-            kline_4h_highs = kline_highs
-            kline_4h_lows = kline_lows
-            kline_4h_volumes = kline_volumes
-
-            # Get open interest (use cached data if available)
-            open_interest_data = await get_cached_open_interest(symbol, "5m", start_ts, end_ts)
+            # Volumes are the only raw series the assembly still needs (the
+            # rest lives in the streaming state); build the array in one pass
+            volumes_np = np.fromiter((k['vol'] for k in cached_klines), dtype=np.float64, count=len(cached_klines))
+
+            # Get open interest (prefetched above)
             open_interest = {
                 "openInterest": str(sum([oi.get('open_interest', 0) for oi in open_interest_data[-1:]] or [0.0])),
                 "time": int(self.simulation_timestamp * 1000)
@@ -915,123 +1352,71 @@ class MarketCoordinator:
             # Simulate funding rate (use a default value for simulation)
             funding_rate = 0.0001  # 0.01% funding rate for simulation
 
-            # Calculate indicators from the price data
-            prices_np = np.array(kline_prices, dtype=float)
-
-            # Calculate EMA20
-            ema20_result = talib.EMA(prices_np, timeperiod=20)
-            current_ema20 = float(ema20_result[-1]) if len(ema20_result) > 0 and not np.isnan(ema20_result[-1]) else current_price
+            # Streaming state was advanced (or reseeded in batch) above
+            state = self._indicator_state[coin]
 
-            # Calculate MACD (12, 26, 9)
-            macd_result, macd_signal, macd_hist = talib.MACD(prices_np, fastperiod=12, slowperiod=26, signalperiod=9)
+            current_ema20 = state["ema20"]
             current_macd = (
-                float(macd_result[-1]) if len(macd_result) > 0 and not np.isnan(macd_result[-1]) else 0,
-                float(macd_signal[-1]) if len(macd_signal) > 0 and not np.isnan(macd_signal[-1]) else 0,
-                float(macd_hist[-1]) if len(macd_hist) > 0 and not np.isnan(macd_hist[-1]) else 0
+                state["macd_value"],
+                state["macd_signal"],
+                state["macd_value"] - state["macd_signal"]
             )
-
-            # Calculate RSI
-            rsi_result = talib.RSI(prices_np, timeperiod=7)
-            current_rsi = float(rsi_result[-1]) if len(rsi_result) > 0 and not np.isnan(rsi_result[-1]) else 50.0
-
-            # Generate series data
-            ema_20_series = [float(x) if not np.isnan(x) else kline_prices[i] for i, x in enumerate(ema20_result)]
-            macd_value_series = [float(x) if not np.isnan(x) else 0 for x in macd_result]
-            macd_signal_series = [float(x) if not np.isnan(x) else 0 for x in macd_signal]
-
-            rsi_7_result = talib.RSI(prices_np, timeperiod=7)
-            rsi_7_series = [float(x) if not np.isnan(x) else 50.0 for x in rsi_7_result]
-
-            rsi_14_result = talib.RSI(prices_np, timeperiod=14)
-            rsi_14_series = [float(x) if not np.isnan(x) else 50.0 for x in rsi_14_result]
-
-            # Calculate long-term indicators
-            prices_np_4h = np.array(kline_4h_prices, dtype=float)
-            highs_np = np.array(kline_4h_highs, dtype=float)
-            lows_np = np.array(kline_4h_lows, dtype=float)
-
-            # Calculate EMAs
-            ema20_result_4h = talib.EMA(prices_np_4h, timeperiod=20)
-            ema50_result_4h = talib.EMA(prices_np_4h, timeperiod=50)
-
-            long_term_ema_20 = float(ema20_result_4h[-1]) if len(ema20_result_4h) > 0 and not np.isnan(ema20_result_4h[-1]) else current_price
-            long_term_ema_50 = float(ema50_result_4h[-1]) if len(ema50_result_4h) > 0 and not np.isnan(ema50_result_4h[-1]) else current_price
-
-            # Calculate ATR
-            atr3_result = talib.ATR(highs_np, lows_np, prices_np_4h, timeperiod=3)
-            atr14_result = talib.ATR(highs_np, lows_np, prices_np_4h, timeperiod=14)
-
-            atr_3_period = float(atr3_result[-1]) if len(atr3_result) > 0 and not np.isnan(atr3_result[-1]) else current_price * 0.01
-            atr_14_period = float(atr14_result[-1]) if len(atr14_result) > 0 and not np.isnan(atr14_result[-1]) else current_price * 0.02
-
-            # Calculate longer-term MACD and RSI series
-            macd_4h_result, macd_4h_signal, macd_4h_hist = talib.MACD(prices_np_4h, fastperiod=12, slowperiod=26, signalperiod=9)
-            long_macd_series = [float(x) if not np.isnan(x) else 0 for x in macd_4h_result]
-
-            rsi_4h_result = talib.RSI(prices_np_4h, timeperiod=14)
-            long_rsi_14_series = [float(x) if not np.isnan(x) else 50.0 for x in rsi_4h_result]
-
-            # Calculate volume data
-            current_volume = kline_4h_volumes[-1] if kline_4h_volumes else current_price * 1000
-            avg_volume = sum(kline_4h_volumes[-14:]) / len(kline_4h_volumes[-14:]) if len(kline_4h_volumes) >= 14 else sum(kline_4h_volumes) / len(kline_4h_volumes) if kline_4h_volumes else current_price * 1000
-
-            # For the intraday prices, keep only the last 10 values
-            intraday_prices = kline_prices[-10:] if len(kline_prices) >= 10 else kline_prices
-
-            # Keep only the last 10 values for each series
-            ema_20_series = ema_20_series[-10:] if len(ema_20_series) >= 10 else ema_20_series
-            macd_value_series = macd_value_series[-10:] if len(macd_value_series) >= 10 else macd_value_series
-            macd_signal_series = macd_signal_series[-10:] if len(macd_signal_series) >= 10 else macd_signal_series
-            rsi_7_series = rsi_7_series[-10:] if len(rsi_7_series) >= 10 else rsi_7_series
-            rsi_14_series = rsi_14_series[-10:] if len(rsi_14_series) >= 10 else rsi_14_series
-
-            # Keep only the last 10 values for longer-term series
-            long_macd_series = long_macd_series[-10:] if len(long_macd_series) >= 10 else long_macd_series
-            long_rsi_14_series = long_rsi_14_series[-10:] if len(long_rsi_14_series) >= 10 else long_rsi_14_series
+            current_rsi = _rsi_from_avgs(state["rsi7_avg_gain"], state["rsi7_avg_loss"])
+
+            # Series come straight out of the maxlen-10 ring buffers
+            intraday_prices = list(state["prices"])
+            ema_20_series = list(state["ema_20_series"])
+            macd_value_series = list(state["macd_value_series"])
+            macd_signal_series = list(state["macd_signal_series"])
+            rsi_7_series = list(state["rsi_7_series"])
+            rsi_14_series = list(state["rsi_14_series"])
+
+            # Long-term indicators: simulation reuses the same 5m window as the
+            # intraday data, so the streaming state already covers them
+            long_term_ema_20 = state["ema20"]
+            long_term_ema_50 = state["ema50"]
+            atr_3_period = state["atr3"]
+            atr_14_period = state["atr14"]
+            long_macd_series = macd_value_series
+            long_rsi_14_series = rsi_14_series
+
+            # Calculate volume data (vectorized mean over the last 14 bars,
+            # or whatever is available)
+            current_volume = float(volumes_np[-1]) if volumes_np.size else current_price * 1000
+            avg_volume = float(volumes_np[-14:].mean()) if volumes_np.size else current_price * 1000
 
             # Simulate liquidation orders (empty for simulation)
             top_10_buy_orders = []
             top_10_sell_orders = []
 
-            # Add coin data to market state
-            coin_data = [
-                f"ALL {coin} DATA (SIMULATION)",
-                f"current_price = {current_price}, current_ema20 = {current_ema20}, current_macd = {current_macd[0]}, current_rsi (7 period) = {current_rsi}",
-                f"",
-                f"In addition, here is the latest {coin} open interest and funding rate for perps (the instrument you are trading):",
-                f"",
-                f"Open Interest: Latest: {open_interest.get('openInterest', '0.0')} Average: {open_interest.get('openInterest', '0.0')}",
-                f"",
-                f"Funding Rate: {funding_rate}",
-                f"",
-                f"Intraday series (by minute, oldest → latest):",
-                f"",
-                f"Mid prices: {intraday_prices}",
-                f"EMA indicators (20‑period): {ema_20_series}",
-                f"MACD value indicators: {macd_value_series}",
-                f"MACD signal indicators: {macd_signal_series}",
-                f"RSI indicators (7‑Period): {rsi_7_series}",
-                f"RSI indicators (14‑Period): {rsi_14_series}",
-                f"",
-                f"Liquidation Orders (Biggest 10 Buy/Sell in past 24h):",
-                f"",
-                f"Top 10 Buy Liquidations:",
-                f"  No liquidation data in simulation mode",
-                f"",
-                f"Top 10 Sell Liquidations:",
-                f"  No liquidation data in simulation mode",
-                f"",
-                f"Longer‑term context (4‑hour timeframe):",
-                f"",
-                f"20‑Period EMA: {long_term_ema_20} vs. 50‑Period EMA: {long_term_ema_50}",
-                f"3‑Period ATR: {atr_3_period} vs. 14‑Period ATR: {atr_14_period}",
-                f"Current Volume: {current_volume} vs. Average Volume: {avg_volume}",
-                f"MACD indicators: {long_macd_series}",
-                f"RSI indicators (14‑Period): {long_rsi_14_series}",
-                f""
-            ]
-
-            market_state_parts.extend(coin_data)
+            # Add coin data to market state via the precompiled template
+            market_state_parts.append(self._COIN_TEMPLATE.format(
+                coin=coin,
+                mode_suffix=" (SIMULATION)",
+                current_price=current_price,
+                current_ema20=current_ema20,
+                current_macd=current_macd[0],
+                current_rsi=current_rsi,
+                open_interest=open_interest.get('openInterest', '0.0'),
+                funding_rate=funding_rate,
+                intraday_header="Intraday series (by minute, oldest → latest):",
+                intraday_prices=intraday_prices,
+                ema_20_series=ema_20_series,
+                macd_value_series=macd_value_series,
+                macd_signal_series=macd_signal_series,
+                rsi_7_series=rsi_7_series,
+                rsi_14_series=rsi_14_series,
+                buy_liquidations="  No liquidation data in simulation mode",
+                sell_liquidations="  No liquidation data in simulation mode",
+                long_term_ema_20=long_term_ema_20,
+                long_term_ema_50=long_term_ema_50,
+                atr_3_period=atr_3_period,
+                atr_14_period=atr_14_period,
+                current_volume=current_volume,
+                avg_volume=avg_volume,
+                long_macd_series=long_macd_series,
+                long_rsi_14_series=long_rsi_14_series
+            ))
 
             # Store detailed coin data for XML update
             all_coin_data[coin.lower()] = {
@@ -1058,12 +1443,12 @@ class MarketCoordinator:
                 "long_rsi_14_series": long_rsi_14_series,
                 "top_10_buy_liquidations": top_10_buy_orders,
                 "top_10_sell_liquidations": top_10_sell_orders,
-                "timestamp": datetime.fromtimestamp(self.simulation_timestamp).isoformat()
+                "timestamp": tick_iso
             }
 
         # Get account information from XML
-        account_summary = self.xml_manager.get_account_summary()
-        active_trades = self.trade_xml_manager.get_active_trades()
+        account_summary = self._tick_cached("account_summary", self.xml_manager.get_account_summary)
+        active_trades = self._tick_cached("active_trades", self.trade_xml_manager.get_active_trades)
 
         # Add account information
         account_info = [
@@ -1071,12 +1456,12 @@ class MarketCoordinator:
             f"Current Total Return (percent): {account_summary.get('total_return', 0.0)}%",
             f"Available Cash: {account_summary.get('available_cash', 10000.0)}",
             f"Current Account Value: {account_summary.get('current_account_value', 10000.0)}",
-            f"Current live positions & performance: {json.dumps(active_trades)}",
+            f"Current live positions & performance: {self._active_trades_json(active_trades)}",
             f"Sharpe Ratio: {account_summary.get('sharpe_ratio', 0.0)}"
         ]
 
         market_state_parts.extend(account_info)
-        market_state_parts.append("---END OF USER PROMPT (SIMULATION)---")
+        market_state_parts.append(self._SIM_PROMPT_FOOTER)
 
         # Update the state_of_market in XML
         await self._update_state_of_market(all_coin_data)
@@ -1086,42 +1471,50 @@ class MarketCoordinator:
 
         # Save the user prompt to file
         user_prompt_text = "\n".join(market_state_parts)
-        self._save_user_prompt_to_file(user_prompt_text, self.simulation_timestamp)
+        await self._save_user_prompt_to_file(user_prompt_text, self.simulation_timestamp)
 
         return user_prompt_text
-    def _save_user_prompt_to_file(self, user_prompt_text: str, simulation_timestamp: float = None):
-        """Save the user prompt to file with appropriate header based on mode"""
-        with open('user_prompt.txt', 'w', encoding='utf-8') as f:
-            if simulation_timestamp is not None:
-                f.write(f"--- (SIMULATION TIME: {datetime.fromtimestamp(simulation_timestamp)}) ---\n\n")
-            else:
-                f.write("--- USER_PROMPT ---\n\n")
-            f.write(user_prompt_text)
-            f.write("\n\n--- End of user prompt ---")
+    async def _save_user_prompt_to_file(self, user_prompt_text: str, simulation_timestamp: float = None):
+        """Save the user prompt to file without blocking the event loop on disk I/O"""
+        if simulation_timestamp is not None:
+            header = f"--- (SIMULATION TIME: {datetime.fromtimestamp(simulation_timestamp)}) ---\n\n"
+        else:
+            header = "--- USER_PROMPT ---\n\n"
+        async with aiofiles.open('user_prompt.txt', 'w', encoding='utf-8') as f:
+            await f.write(header)
+            await f.write(user_prompt_text)
+            await f.write("\n\n--- End of user prompt ---")
 
     async def _update_active_trades_pnl(self, active_trades, all_coin_data):
         """Update unrealized PNL for active trades and persist to XML"""
         try:
+            # Collect the trades we can price, then compute every PNL in one
+            # vectorized pass instead of per-trade Python arithmetic
+            priced = []
             for trade in active_trades:
                 symbol = trade.get('symbol') or trade.get('coin', '').upper()
                 if symbol and symbol.lower() in all_coin_data:
                     current_price = all_coin_data[symbol.lower()]['current_price']
-                    entry_price = trade.get('entry_price', 0)
-                    quantity = trade.get('quantity', 0)
-                    leverage = trade.get('leverage', 1)
-                    position_type = trade.get('position_type', 'long')
+                    if trade.get('entry_price', 0) > 0 and current_price > 0:
+                        priced.append((trade, symbol, current_price))
+
+            if not priced:
+                return
+
+            entries = np.array([t.get('entry_price', 0) for t, _, _ in priced], dtype=np.float64)
+            qtys = np.abs(np.array([t.get('quantity', 0) for t, _, _ in priced], dtype=np.float64))
+            leverages = np.array([t.get('leverage', 1) for t, _, _ in priced], dtype=np.float64)
+            signs = np.array([1.0 if t.get('position_type', 'long') == 'long' else -1.0 for t, _, _ in priced])
+            currents = np.array([price for _, _, price in priced], dtype=np.float64)
 
-                    if entry_price > 0 and current_price > 0:
-                        if position_type == "long":
-                            unrealized_pnl = (current_price - entry_price) * abs(quantity) * leverage
-                        else:  # short
-                            unrealized_pnl = (entry_price - current_price) * abs(quantity) * leverage
+            pnls = signs * (currents - entries) * qtys * leverages
 
-                        trade['unrealized_pnl'] = unrealized_pnl
-                        trade['pnl'] = unrealized_pnl  # Also update pnl for consistency
+            for (trade, symbol, _), unrealized_pnl in zip(priced, pnls.tolist()):
+                trade['unrealized_pnl'] = unrealized_pnl
+                trade['pnl'] = unrealized_pnl  # Also update pnl for consistency
 
-                        # Update the XML file with the new PNL value
-                        await self._update_xml_trade_pnl(trade, symbol, unrealized_pnl)
+                # Update the XML file with the new PNL value
+                await self._update_xml_trade_pnl(trade, symbol, unrealized_pnl)
 
         except Exception as e:
             logger.info(f"Error updating active trades PNL: {e}")
@@ -1132,44 +1525,36 @@ class MarketCoordinator:
             # Find the agent that owns this trade
             agent_kind = trade.get('agent', 'AgentDeepSeek')  # Default fallback
 
-            # Get the agent section using the shared manager
-            agent_elem = self.xml_manager.get_agent_section(agent_kind)
-
-            if agent_elem is not None:
-                # Find the active trade
-                active_trades = agent_elem.find("active_trades")
-                if active_trades is not None:
-                    for trade_elem in active_trades.findall("trade"):
-                        coin_elem = trade_elem.find("coin")
-                        symbol_elem = trade_elem.find("symbol")
-                        trade_symbol = None
-                        if coin_elem is not None and coin_elem.text:
-                            trade_symbol = coin_elem.text.upper()
-                        elif symbol_elem is not None and symbol_elem.text:
-                            trade_symbol = symbol_elem.text.upper()
-
-                        if trade_symbol == symbol.upper():
-                            # Update unrealized_pnl
-                            pnl_elem = trade_elem.find("unrealized_pnl")
-                            if pnl_elem is None:
-                                pnl_elem = ET.SubElement(trade_elem, "unrealized_pnl")
-                            pnl_elem.text = str(pnl_value)
-
-                            # Also update pnl for consistency
-                            pnl_elem2 = trade_elem.find("pnl")
-                            if pnl_elem2 is None:
-                                pnl_elem2 = ET.SubElement(trade_elem, "pnl")
-                            pnl_elem2.text = str(pnl_value)
-
-                            # Write back to file
-                            self.xml_manager._write_xml()
-                            logger.info(f"Updated XML for {symbol} trade PNL: {pnl_value}")
-                            break
+            # Indexed lookup instead of scanning every active trade
+            trade_elem = self.xml_manager.find_active_trade(agent_kind, symbol)
+
+            if trade_elem is not None:
+                # Update unrealized_pnl (and pnl for consistency) with a
+                # single pass over the children instead of two find() scans
+                children = {child.tag: child for child in trade_elem}
+                for tag in ("unrealized_pnl", "pnl"):
+                    pnl_elem = children.get(tag)
+                    if pnl_elem is None:
+                        pnl_elem = ET.SubElement(trade_elem, tag)
+                    pnl_elem.text = str(pnl_value)
+
+                # Written back to file on the next cycle flush; bump the
+                # version so the cached trades JSON is rebuilt with the
+                # fresh PNL
+                self._xml_dirty = True
+                self.trade_xml_manager.version += 1
+                logger.info(f"Updated XML for {symbol} trade PNL: {pnl_value}")
 
         except Exception as e:
             logger.info(f"Error updating XML trade PNL: {e}")
 
     async def close(self):
-        """Close the liquidation client"""
+        """Close the fetcher and liquidation client and flush pending XML changes"""
+        if self._xml_dirty:
+            self.xml_manager._write_xml()
+            self._xml_dirty = False
+        if self._fetcher is not None:
+            await self._fetcher.__aexit__(None, None, None)
+            self._fetcher = None
         if self.liquidation_client:
             await self.liquidation_client.stop_background_collection()
@@ -1,28 +1,100 @@
-import xml.etree.ElementTree as ET
+# Prefer lxml's C serializer: API-compatible for the Element/SubElement
+# building this codebase does, and 5-15x faster writing the growing
+# state_of_market tree than pure-Python ElementTree
+try:
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    LXML_AVAILABLE = False
+import io
+import os
+from contextlib import contextmanager
 from datetime import datetime
 import json
 from typing import Dict
 
+# Precompiled XPath (lxml only) so agent lookup by kind runs in C instead
+# of a Python findall + attribute filter loop
+_AGENT_BY_KIND = ET.XPath("./agent[@kind=$kind]") if LXML_AVAILABLE else None
+
 class TradingXMLManager:
     """Shared XML manager for the trading system"""
     
     def __init__(self, xml_file_path: str = "trade.xml"):
         self.xml_file_path = xml_file_path
         self.root = None
+        # Coalesce writes: setters mark the tree dirty and flush immediately
+        # unless a batch() block is open, in which case the document is
+        # rewritten once on exit instead of once per setter
+        self._dirty = False
+        self._batch_depth = 0
+        # (kind, SYMBOL) -> active <trade> element, built lazily so repeated
+        # per-symbol PnL updates skip the linear scan over all trades
+        self._trade_index = {}
+        # Cached top-level sections; root children never move, so these save
+        # a linear root scan on every accessor call
+        self._agents_elem = None
+        self._state_of_market_elem = None
+        # kind -> <agent> element, so per-update accessors skip the scan
+        # over agents; invalidated when agents are removed or restructured
+        self._agent_by_kind = {}
+        # Reused serialization buffer for the stdlib write path
+        self._buf = io.BytesIO()
         self._initialize_xml()
+        self._cache_sections()
+
+    def _cache_sections(self):
+        """Cache the agents and state_of_market elements under the root"""
+        self._agents_elem = self.root.find("agents")
+        self._state_of_market_elem = self.root.find("state_of_market")
+
+    def _get_agents_elem(self):
+        """The <agents> element, created (and cached) on first use"""
+        if self._agents_elem is None:
+            self._agents_elem = ET.SubElement(self.root, "agents")
+        return self._agents_elem
+
+    def _mark_dirty(self):
+        """Record a pending mutation, flushing unless inside a batch"""
+        self._dirty = True
+        if self._batch_depth == 0:
+            self.flush()
+
+    def flush(self):
+        """Write the document out if there are unflushed mutations"""
+        if self._dirty:
+            self._write_xml()
+            self._dirty = False
+
+    @contextmanager
+    def batch(self):
+        """Coalesce every write inside the block into one flush on exit"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
     
     def _initialize_xml(self):
         """Initialize the XML structure if it doesn't exist"""
         try:
-            # Try to load existing XML
-            tree = ET.parse(self.xml_file_path)
+            # Try to load existing XML; with lxml, drop inter-element
+            # whitespace on parse so pretty_print reformats cleanly instead
+            # of accumulating indentation on every load/write cycle
+            if LXML_AVAILABLE:
+                tree = ET.parse(self.xml_file_path, parser=ET.XMLParser(remove_blank_text=True))
+            else:
+                tree = ET.parse(self.xml_file_path)
             self.root = tree.getroot()
 
             # Ensure the structure is correct (trading as root)
             if self.root.tag == 'agent':
                 # Convert from old structure to new structure
                 self._convert_to_trading_structure()
-        except FileNotFoundError:
+        except OSError:  # lxml raises plain OSError for a missing file
             # Create new XML structure with trading as root
             self.root = ET.Element("trading")
 
@@ -62,20 +134,37 @@ class TradingXMLManager:
         # Create agents section
         agents_elem = ET.SubElement(new_root, "agents")
 
-        # Move everything else under new agent section
-        agent_elem = ET.SubElement(agents_elem, "agent")
-
-        # Copy all elements from old root to new agent
-        for child in old_root:
-            agent_elem.append(child)
+        # Retag the old root and hang it under agents wholesale, so the
+        # existing subtree is reparented in one append instead of one per
+        # child element
+        old_root.tag = "agent"
+        agents_elem.append(old_root)
 
         self.root = new_root
+        self._agent_by_kind.clear()
+        self._cache_sections()
     
     def _write_xml(self):
-        """Write the current XML structure to file"""
-        tree = ET.ElementTree(self.root)
-        ET.indent(tree, space="  ", level=0)  # For pretty printing
-        tree.write(self.xml_file_path, encoding="utf-8", xml_declaration=True)
+        """Write the current XML structure to file.
+
+        Serializes to one bytes buffer and lands it with a single write plus
+        os.replace, so readers never see a torn document and the many small
+        encoder writes of streaming straight to the path are avoided.
+        """
+        if LXML_AVAILABLE:
+            data = ET.tostring(self.root, pretty_print=True, xml_declaration=True, encoding="utf-8")
+        else:
+            tree = ET.ElementTree(self.root)
+            ET.indent(tree, space="  ", level=0)  # For pretty printing
+            self._buf.seek(0)
+            self._buf.truncate(0)
+            tree.write(self._buf, encoding="utf-8", xml_declaration=True)
+            data = self._buf.getvalue()
+
+        tmp_path = self.xml_file_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.xml_file_path)
     
     def get_agent_section(self, kind=None):
         """Get the agent section for a specific kind, whether it's the root or a child of trading root"""
@@ -84,18 +173,27 @@ class TradingXMLManager:
             return self.root
         elif self.root.tag == "trading":
             # New structure, agent is child of agents
-            agents_elem = self.root.find("agents")
-            if agents_elem is None:
-                agents_elem = ET.SubElement(self.root, "agents")
+            agents_elem = self._get_agents_elem()
 
             if kind:
+                cached = self._agent_by_kind.get(kind)
+                if cached is not None:
+                    return cached
                 # Find existing agent with this kind
-                for agent_elem in agents_elem.findall("agent"):
-                    if agent_elem.get("kind") == kind:
-                        return agent_elem
+                if _AGENT_BY_KIND is not None:
+                    match = _AGENT_BY_KIND(agents_elem, kind=kind)
+                    if match:
+                        self._agent_by_kind[kind] = match[0]
+                        return match[0]
+                else:
+                    for agent_elem in agents_elem.findall("agent"):
+                        if agent_elem.get("kind") == kind:
+                            self._agent_by_kind[kind] = agent_elem
+                            return agent_elem
                 # Create new agent element for this kind
                 agent_elem = ET.SubElement(agents_elem, "agent")
                 agent_elem.set("kind", kind)
+                self._agent_by_kind[kind] = agent_elem
                 return agent_elem
             else:
                 # Fallback: return first agent or create one
@@ -108,20 +206,72 @@ class TradingXMLManager:
             return self.root
     
     def get_state_of_market_section(self):
-        """Get the state_of_market section"""
-        if self.root.tag == "trading":
-            state_of_market = self.root.find("state_of_market")
-            if state_of_market is None:
-                # Create state_of_market element if it doesn't exist
-                state_of_market = ET.SubElement(self.root, "state_of_market")
-            return state_of_market
-        else:
-            # For backward compatibility
-            state_of_market = self.root.find("state_of_market")
-            if state_of_market is None:
-                state_of_market = ET.SubElement(self.root, "state_of_market")
-            return state_of_market
+        """Get the state_of_market section, creating it if needed"""
+        if self._state_of_market_elem is None:
+            self._state_of_market_elem = ET.SubElement(self.root, "state_of_market")
+        return self._state_of_market_elem
     
+    @staticmethod
+    def _trade_symbol(trade_elem):
+        """Symbol of a <trade> element, from its coin or symbol child"""
+        coin_elem = trade_elem.find("coin")
+        if coin_elem is not None and coin_elem.text:
+            return coin_elem.text.upper()
+        symbol_elem = trade_elem.find("symbol")
+        if symbol_elem is not None and symbol_elem.text:
+            return symbol_elem.text.upper()
+        return None
+
+    def find_active_trade(self, kind, symbol):
+        """Find the active <trade> element for an agent kind and symbol.
+
+        Served from a lazily built (kind, symbol) index; a cached element is
+        revalidated against its parent (lxml keeps parent links) so trades
+        closed or cleared since the last lookup trigger a rescan.
+        """
+        symbol = symbol.upper()
+        key = (kind, symbol)
+        trade_elem = self._trade_index.get(key)
+        if trade_elem is not None and LXML_AVAILABLE:
+            parent = trade_elem.getparent()
+            if parent is not None and parent.tag == "active_trades":
+                return trade_elem
+
+        # Miss or stale entry: rebuild this agent's slice of the index
+        agent_elem = self.get_agent_section(kind)
+        active_trades = agent_elem.find("active_trades") if agent_elem is not None else None
+        self._trade_index = {k: v for k, v in self._trade_index.items() if k[0] != kind}
+        if active_trades is None:
+            return None
+        for trade_elem in active_trades.findall("trade"):
+            trade_symbol = self._trade_symbol(trade_elem)
+            if trade_symbol:
+                self._trade_index[(kind, trade_symbol)] = trade_elem
+        return self._trade_index.get(key)
+
+    @staticmethod
+    def _coin_data_from_elem(coin_elem):
+        """Parse one state_of_market <coin> element into a data dict"""
+        coin_data = {}
+        for elem in coin_elem:
+            if elem.tag != "name":  # Skip the name element
+                if elem.tag.endswith("_series"):  # Handle series elements
+                    # Legacy layout: one <value> child per point (iterfind
+                    # avoids materializing an Element list); otherwise the
+                    # current space-separated text payload
+                    values = [float(v.text) for v in elem.iterfind("value")]
+                    if not values:
+                        values = [float(v) for v in (elem.text or "").split()]
+                    coin_data[elem.tag] = values
+                else:
+                    # float() itself is the cheapest validity check: one C
+                    # call, no throwaway strings from the old digit sniff
+                    try:
+                        coin_data[elem.tag] = float(elem.text)
+                    except (TypeError, ValueError):
+                        coin_data[elem.tag] = elem.text
+        return coin_data
+
     def get_market_data_from_xml(self):
         """Extract market data from the XML state_of_market section"""
         state_of_market = self.get_state_of_market_section()
@@ -129,28 +279,40 @@ class TradingXMLManager:
 
         for coin_elem in state_of_market.findall("coin"):
             coin_name = coin_elem.find("name").text.lower()
-            coin_data = {}
-
-            # Get all the individual elements
-            for elem in coin_elem:
-                if elem.tag != "name":  # Skip the name element
-                    if elem.tag.endswith("_series"):  # Handle series elements
-                        # Extract all "value" children for series
-                        values = [float(v.text) for v in elem.findall("value")]
-                        coin_data[elem.tag] = values
-                    else:
-                        try:
-                            # Convert to appropriate type (float for numbers, string for others)
-                            value = float(elem.text) if elem.text.replace('.', '', 1).replace('-', '', 1).isdigit() else elem.text
-                            coin_data[elem.tag] = value
-                        except (ValueError, AttributeError):
-                            # If conversion fails, keep as string
-                            coin_data[elem.tag] = elem.text
-
-            market_data[coin_name] = coin_data
+            market_data[coin_name] = self._coin_data_from_elem(coin_elem)
 
         return market_data
 
+    @classmethod
+    def load_market_data_streaming(cls, path):
+        """Parse only the market <coin> sections straight from a file.
+
+        Reload paths (dashboard polling, external edits) only need the
+        state_of_market data, so iterparse streams the document and frees
+        each coin element after it is processed instead of materializing the
+        full trade/agent DOM.
+        """
+        market_data = {}
+        if LXML_AVAILABLE:
+            context = ET.iterparse(path, tag="coin", events=("end",))
+        else:
+            context = (
+                (event, elem) for event, elem in ET.iterparse(path, events=("end",))
+                if elem.tag == "coin"
+            )
+        for _, coin_elem in context:
+            name_elem = coin_elem.find("name")
+            if name_elem is None or not name_elem.text:
+                # A <coin> leaf inside a trade, not a market section
+                continue
+            market_data[name_elem.text.lower()] = cls._coin_data_from_elem(coin_elem)
+            coin_elem.clear()
+            if LXML_AVAILABLE:
+                # Also drop already-processed siblings to keep memory bounded
+                while coin_elem.getprevious() is not None:
+                    del coin_elem.getparent()[0]
+        return market_data
+
     def get_account_summary(self, kind=None) -> Dict[str, float]:
         """Get the current account summary from XML for a specific agent kind"""
         agent_elem = self.get_agent_section(kind)
@@ -182,14 +344,22 @@ class TradingXMLManager:
         if summary_elem is None:
             summary_elem = ET.SubElement(agent_elem, "summary")
 
+        # One pass over the children instead of a linear find() per key;
+        # skip the write entirely when every value is already in the tree
+        existing = {child.tag: child for child in summary_elem}
+        changed = False
         for key, value in updates.items():
-            elem = summary_elem.find(key)
-            if elem is not None:
-                elem.text = str(value)
-            else:
-                ET.SubElement(summary_elem, key).text = str(value)
-
-        self._write_xml()
+            text = str(value)
+            elem = existing.get(key)
+            if elem is None:
+                ET.SubElement(summary_elem, key).text = text
+                changed = True
+            elif elem.text != text:
+                elem.text = text
+                changed = True
+
+        if changed:
+            self._mark_dirty()
 
     def update_cash_position(self, amount_change: float, kind=None):
         """Update available cash by adding/subtracting the amount for a specific agent kind"""
@@ -210,7 +380,7 @@ class TradingXMLManager:
         """Clear all active and closed trades from XML for a specific agent kind or all agents if kind=None"""
         if kind is None:
             # Clear trades for all agents
-            agents_elem = self.root.find("agents")
+            agents_elem = self._agents_elem
             if agents_elem is not None:
                 for agent_elem in agents_elem.findall("agent"):
                     active_trades = agent_elem.find("active_trades")
@@ -232,30 +402,31 @@ class TradingXMLManager:
             if closed_trades is not None:
                 closed_trades.clear()
 
-        # Ensure state_of_market section is preserved
-        state_of_market = self.get_state_of_market_section()
-        if state_of_market is None:
-            # Recreate state_of_market if it was accidentally cleared
-            state_of_market = ET.SubElement(self.root, "state_of_market")
+        # Cleared trade elements must not be served from the index
+        self._trade_index.clear()
 
-        # Ensure agents section is preserved
-        agents_elem = self.root.find("agents")
-        if agents_elem is None:
-            agents_elem = ET.SubElement(self.root, "agents")
+        # Ensure state_of_market and agents sections are preserved
+        self.get_state_of_market_section()
+        self._get_agents_elem()
 
-        self._write_xml()
+        self._mark_dirty()
 
     def remove_unused_agents(self, active_kinds):
         """Remove agents from XML that are not in the active_kinds list"""
-        agents_elem = self.root.find("agents")
+        agents_elem = self._agents_elem
         if agents_elem is None:
             return
 
         # Get all agent elements
         agent_elems = agents_elem.findall("agent")
+        removed = False
         for agent_elem in agent_elems:
             kind = agent_elem.get("kind")
             if kind not in active_kinds:
                 agents_elem.remove(agent_elem)
+                self._agent_by_kind.pop(kind, None)
+                removed = True
 
-        self._write_xml()
\ No newline at end of file
+        # Only rewrite the document if an agent was actually dropped
+        if removed:
+            self._mark_dirty()
\ No newline at end of file
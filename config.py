@@ -0,0 +1,29 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class Config:
+    """Environment-sourced settings, read once at import time.
+
+    Freezing the values here keeps os.environ dict walks out of hot paths
+    and gives every module the same view of the configuration.
+    """
+    deepseek_api_key: Optional[str]
+    binance_api_key: Optional[str]
+    binance_secret_key: Optional[str]
+    binance_api_secret: Optional[str]
+    cmc_api_key: str
+
+
+CONFIG = Config(
+    deepseek_api_key=os.getenv("DEEPSEEK_API_KEY"),
+    binance_api_key=os.getenv("BINANCE_API_KEY"),
+    binance_secret_key=os.getenv("BINANCE_SECRET_KEY"),
+    binance_api_secret=os.getenv("BINANCE_API_SECRET"),
+    cmc_api_key=os.getenv("CMC_API_KEY") or "2efa3a13-5837-4fe6-8dda-ffb11da22ef0",
+)
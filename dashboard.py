@@ -1,11 +1,21 @@
-import xml.etree.ElementTree as ET
 from datetime import datetime
-import time
 import threading
 import json
 import os
+import numpy as np
+# Prefer orjson for serializing the large agent/market payloads on the API
+# routes (~3-10x faster than Flask's default encoder)
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
 from logging_config import logger
-from flask import Flask, render_template, jsonify, request, make_response
+# ET is lxml.etree when available (C-implemented parse/traversal), with a
+# stdlib ElementTree fallback handled centrally in XmlManager
+from XmlManager import ET, LXML_AVAILABLE, TradingXMLManager
+from flask import Flask, render_template, jsonify, request
 from flask_socketio import SocketIO, emit
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -18,31 +28,59 @@ connected_clients = set()
 
 INITIAL_CAPITAL = 10000.0
 
+# Tag sets for trade parsing; frozenset membership replaces the long
+# per-child if/elif chain of string comparisons in the hot parse loop
+_FLOAT_TAGS = frozenset(("entry_price", "quantity", "stop_loss", "exit_price", "pnl", "unrealized_pnl"))
+_STR_TAGS = frozenset(("timestamp", "symbol", "action", "status"))
+
 class DashboardFileHandler(FileSystemEventHandler):
     """Handler for file system events in dashboard directories"""
 
+    # Editors fire bursts of modify/create events per save (temp file,
+    # rename, attribute touch); coalesce them into one reload broadcast
+    DEBOUNCE_SECONDS = 0.5
+
+    def __init__(self):
+        super().__init__()
+        self._pending_timer = None
+        self._timer_lock = threading.Lock()
+
+    def _schedule_reload(self):
+        """Broadcast one reload after the debounce window, not per event"""
+        with self._timer_lock:
+            if self._pending_timer is not None:
+                return
+            self._pending_timer = threading.Timer(self.DEBOUNCE_SECONDS, self._emit_reload)
+            self._pending_timer.daemon = True
+            self._pending_timer.start()
+
+    def _emit_reload(self):
+        with self._timer_lock:
+            self._pending_timer = None
+        # Notify all connected clients to reload
+        socketio.emit('reload_page', {'message': 'Dashboard files updated'})
+
     def on_modified(self, event):
         """Called when a file is modified"""
         if not event.is_directory:
             # Check if the file is in templates or static directories
             if 'templates' in event.src_path or 'static' in event.src_path:
                 logger.info(f"Dashboard file changed: {event.src_path}")
-                # Notify all connected clients to reload
-                socketio.emit('reload_page', {'message': 'Dashboard files updated'})
+                self._schedule_reload()
 
     def on_created(self, event):
         """Called when a file is created"""
         if not event.is_directory:
             if 'templates' in event.src_path or 'static' in event.src_path:
                 logger.info(f"Dashboard file created: {event.src_path}")
-                socketio.emit('reload_page', {'message': 'Dashboard files updated'})
+                self._schedule_reload()
 
     def on_deleted(self, event):
         """Called when a file is deleted"""
         if not event.is_directory:
             if 'templates' in event.src_path or 'static' in event.src_path:
                 logger.info(f"Dashboard file deleted: {event.src_path}")
-                socketio.emit('reload_page', {'message': 'Dashboard files updated'})
+                self._schedule_reload()
 
 class DashboardDataManager:
     """Manages data extraction from trade.xml for the dashboard"""
@@ -50,31 +88,53 @@ class DashboardDataManager:
     def __init__(self, xml_file="trade.xml"):
         self.xml_file = xml_file
         self.last_update = None
+        # Derived views keyed on the file's (mtime_ns, size) so the
+        # background thread and the API routes share one parse per
+        # trade.xml write instead of reparsing on every call
+        self._cache = {"key": None, "agents": None, "market": None}
+
+    def _refresh_cache(self):
+        """Drop cached results if trade.xml changed since the last read"""
+        st = os.stat(self.xml_file)
+        key = (st.st_mtime_ns, st.st_size)
+        if key != self._cache["key"]:
+            self._cache = {"key": key, "agents": None, "market": None}
 
     def get_agents_data(self):
         """Extract all agent data from XML"""
         if not os.path.exists(self.xml_file) or os.path.getsize(self.xml_file) == 0:
             return []
         try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
+            self._refresh_cache()
+            if self._cache["agents"] is not None:
+                return self._cache["agents"]
 
             agents_data = []
 
-            # Handle both old and new XML structures
-            if root.tag == "trading":
-                agents_elem = root.find("agents")
-                if agents_elem is not None:
-                    for agent_elem in agents_elem.findall("agent"):
-                        agent_data = self._parse_agent_element(agent_elem)
-                        if agent_data:
-                            agents_data.append(agent_data)
+            # Stream agent sections instead of materializing the whole
+            # document; each one is parsed at its end event and then freed,
+            # so memory stays bounded as closed_trades grow
+            if LXML_AVAILABLE:
+                context = ET.iterparse(self.xml_file, tag="agent", events=("end",))
             else:
-                # Old structure - single agent
-                agent_data = self._parse_agent_element(root)
+                context = (
+                    (event, elem) for event, elem in ET.iterparse(self.xml_file, events=("end",))
+                    if elem.tag == "agent"
+                )
+            for _, agent_elem in context:
+                parent = agent_elem.getparent() if LXML_AVAILABLE else None
+                if parent is not None and parent.tag != "agents":
+                    continue
+                agent_data = self._parse_agent_element(agent_elem)
                 if agent_data:
                     agents_data.append(agent_data)
+                agent_elem.clear()
+                if parent is not None:
+                    # Also drop already-processed siblings to keep memory bounded
+                    while agent_elem.getprevious() is not None:
+                        del parent[0]
 
+            self._cache["agents"] = agents_data
             return agents_data
 
         except Exception as e:
@@ -87,8 +147,24 @@ class DashboardDataManager:
         try:
             agent_kind = agent_elem.get("kind", "Unknown")
 
+            # Locate the sections in one pass over the children instead of
+            # five linear find() scans
+            summary_elem = active_trades_elem = closed_trades_elem = None
+            response_elem = latest_response_elem = None
+            for child in agent_elem:
+                tag = child.tag
+                if tag == "summary":
+                    summary_elem = child
+                elif tag == "active_trades":
+                    active_trades_elem = child
+                elif tag == "closed_trades":
+                    closed_trades_elem = child
+                elif tag == "response":
+                    response_elem = child
+                elif tag == "latest_response":
+                    latest_response_elem = child
+
             # Get summary data
-            summary_elem = agent_elem.find("summary")
             summary = {}
             if summary_elem is not None:
                 for elem in summary_elem:
@@ -102,51 +178,51 @@ class DashboardDataManager:
             pnl = current_value - INITIAL_CAPITAL
             pnl_percentage = (pnl / INITIAL_CAPITAL) * 100 if INITIAL_CAPITAL > 0 else 0
 
-            # Get active trades
+            # Get active and closed trades, tracking the most recent trade
+            # timestamp on the way instead of rescanning the combined list
+            latest_ts = None
+
             active_trades = []
-            active_trades_elem = agent_elem.find("active_trades")
             if active_trades_elem is not None:
                 for trade_elem in active_trades_elem:
                     trade_data = self._parse_trade_element(trade_elem)
                     if trade_data:
                         active_trades.append(trade_data)
+                        ts = trade_data.get('timestamp')
+                        if ts and (latest_ts is None or ts > latest_ts):
+                            latest_ts = ts
 
-            # Get closed trades
             closed_trades = []
-            closed_trades_elem = agent_elem.find("closed_trades")
             if closed_trades_elem is not None:
                 for trade_elem in closed_trades_elem:
                     trade_data = self._parse_trade_element(trade_elem)
                     if trade_data:
                         closed_trades.append(trade_data)
+                        ts = trade_data.get('timestamp')
+                        if ts and (latest_ts is None or ts > latest_ts):
+                            latest_ts = ts
 
             # Get latest response
             latest_response = None
-            response_elem = agent_elem.find("response")
             if response_elem is not None and response_elem.text:
                 try:
-                    latest_response = json.loads(response_elem.text)
-                except json.JSONDecodeError:
+                    latest_response = _json_loads(response_elem.text)
+                except ValueError:
                     latest_response = {"raw": response_elem.text}
 
             # Also check for latest_response element
-            latest_response_elem = agent_elem.find("latest_response")
             if latest_response_elem is not None:
                 response_elem = latest_response_elem.find("response")
                 if response_elem is not None and response_elem.text:
                     try:
-                        latest_response = json.loads(response_elem.text)
-                    except json.JSONDecodeError:
+                        latest_response = _json_loads(response_elem.text)
+                    except ValueError:
                         latest_response = {"raw": response_elem.text}
 
             # Get timestamp from latest trade instead of response
             timestamp = None
-            all_trades = active_trades + closed_trades
-            if all_trades:
-                # Find the most recent trade timestamp
-                timestamps = [trade.get('timestamp') for trade in all_trades if trade.get('timestamp')]
-                if timestamps:
-                    timestamp = max(timestamps)
+            if active_trades or closed_trades:
+                timestamp = latest_ts
             # Fallback to response timestamp if no trades
             elif latest_response and 'timestamp' in latest_response:
                 timestamp = latest_response['timestamp']
@@ -173,28 +249,30 @@ class DashboardDataManager:
         try:
             trade_data = {}
             for elem in trade_elem:
-                if elem.tag in ["entry_price", "quantity", "stop_loss", "exit_price", "pnl", "unrealized_pnl"]:
+                tag = elem.tag
+                text = elem.text
+                if tag in _FLOAT_TAGS:
                     try:
-                        trade_data[elem.tag] = float(elem.text or 0.0)
+                        trade_data[tag] = float(text or 0.0)
                     except (ValueError, TypeError):
-                        trade_data[elem.tag] = 0.0
-                elif elem.tag in ["timestamp", "symbol", "action", "status"]:
-                    trade_data[elem.tag] = elem.text or ""
-                elif elem.tag == "coin":
-                    trade_data["symbol"] = elem.text.upper() if elem.text else ""
-                elif elem.tag == "price":
+                        trade_data[tag] = 0.0
+                elif tag in _STR_TAGS:
+                    trade_data[tag] = text or ""
+                elif tag == "coin":
+                    trade_data["symbol"] = text.upper() if text else ""
+                elif tag == "price":
                     # For closed trades, price is exit_price
                     try:
-                        trade_data["exit_price"] = float(elem.text or 0.0)
+                        trade_data["exit_price"] = float(text or 0.0)
                     except (ValueError, TypeError):
                         trade_data["exit_price"] = 0.0
-                elif elem.tag == "reasoning":
+                elif tag == "reasoning":
                     # Extract reasoning text and check for manual stop loss calculation
-                    reasoning_text = elem.text or ""
+                    reasoning_text = text or ""
                     trade_data["reasoning"] = reasoning_text
                     trade_data["stop_loss_source"] = "manual" if "Stop-loss calculated manually" in reasoning_text else "llm"
                 else:
-                    trade_data[elem.tag] = elem.text or ""
+                    trade_data[tag] = text or ""
 
             return trade_data
 
@@ -207,44 +285,14 @@ class DashboardDataManager:
         if not os.path.exists(self.xml_file) or os.path.getsize(self.xml_file) == 0:
             return {}
         try:
-            tree = ET.parse(self.xml_file)
-            root = tree.getroot()
-
-            market_data = {}
-
-            # Handle both old and new XML structures
-            if root.tag == "trading":
-                state_of_market = root.find("state_of_market")
-            else:
-                state_of_market = root.find("state_of_market")
-
-            if state_of_market is not None:
-                for coin_elem in state_of_market.findall("coin"):
-                    coin_name = coin_elem.find("name").text.lower()
-                    coin_data = {}
-
-                    # Get current price and indicators
-                    for elem in coin_elem:
-                        if elem.tag == "name":
-                            continue
-                        elif elem.tag.endswith("_series"):
-                            # Handle series data
-                            values = []
-                            for value_elem in elem.findall("value"):
-                                try:
-                                    values.append(float(value_elem.text))
-                                except (ValueError, TypeError):
-                                    values.append(0.0)
-                            coin_data[elem.tag] = values
-                        else:
-                            try:
-                                coin_data[elem.tag] = float(elem.text) if elem.text and elem.text.replace('.', '', 1).replace('-', '', 1).replace('e', '', 1).replace('+', '', 1).isdigit() else elem.text
-                            except (ValueError, TypeError, AttributeError):
-                                coin_data[elem.tag] = elem.text
-
-                    market_data[coin_name] = coin_data
-
-            return market_data
+            self._refresh_cache()
+            if self._cache["market"] is not None:
+                return self._cache["market"]
+            # Stream only the coin sections instead of materializing the
+            # whole trade document on every poll
+            market = TradingXMLManager.load_market_data_streaming(self.xml_file)
+            self._cache["market"] = market
+            return market
 
         except Exception as e:
             logger.info(f"Error parsing market data: {e}")
@@ -252,95 +300,104 @@ class DashboardDataManager:
 
     def get_leaderboard_data(self):
         """Generate leaderboard data sorted by PNL and Sharpe ratio"""
-        agents = self.get_agents_data()
+        return self._build_leaderboard(self.get_agents_data())
+
+    @staticmethod
+    def _build_leaderboard(agents):
+        """Rank an already-parsed agents list by PNL and Sharpe ratio"""
+        if not agents:
+            return []
 
-        # Sort by PNL descending, then by Sharpe ratio descending
-        sorted_agents = sorted(agents,
-                             key=lambda x: (x["pnl"], x.get("summary", {}).get("sharpe_ratio", 0)),
-                             reverse=True)
+        # Sort by PNL descending, then by Sharpe ratio descending;
+        # lexsort over two float arrays does the key extraction once per
+        # agent instead of two dict lookups per comparison
+        n = len(agents)
+        pnls = np.fromiter((a["pnl"] for a in agents), dtype=np.float64, count=n)
+        sharpes = np.fromiter(
+            (a.get("summary", {}).get("sharpe_ratio", 0) for a in agents),
+            dtype=np.float64, count=n)
+        order = np.lexsort((-sharpes, -pnls))
 
         leaderboard = []
-        for rank, agent in enumerate(sorted_agents, 1):
+        for rank, i in enumerate(order, 1):
+            agent = agents[i]
             leaderboard.append({
                 "rank": rank,
                 "agent": agent["kind"],
                 "pnl": agent["pnl"],
                 "pnl_percentage": agent["pnl_percentage"],
-                "sharpe_ratio": agent.get("summary", {}).get("sharpe_ratio", 0),
+                "sharpe_ratio": float(sharpes[i]),
                 "active_trades": agent["active_trades_count"],
                 "closed_trades": agent["closed_trades_count"]
             })
 
         return leaderboard
 
+    def snapshot(self):
+        """One-pass (agents, market, leaderboard) view of trade.xml.
+
+        The update paths need all three; building the leaderboard from the
+        already-parsed agents list avoids a second walk over the document.
+        """
+        agents = self.get_agents_data()
+        market = self.get_market_data()
+        return agents, market, self._build_leaderboard(agents)
+
 # Initialize data manager
 data_manager = DashboardDataManager()
 
-@app.route('/')
-def index():
-    """Redirect to live page"""
-    response = make_response(render_template('live.html'))
+def fast_json(obj):
+    """JSON response via orjson when installed, falling back to jsonify"""
+    if orjson is None:
+        return jsonify(obj)
+    return app.response_class(
+        orjson.dumps(obj, default=str), mimetype='application/json')
+
+@app.after_request
+def disable_caching(response):
+    """Mark every response uncacheable; the data changes every tick"""
     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '0'
     return response
 
+@app.route('/')
+def index():
+    """Redirect to live page"""
+    return render_template('live.html')
+
 @app.route('/live')
 def live():
     """Live dashboard page"""
-    response = make_response(render_template('live.html'))
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    return render_template('live.html')
 
 @app.route('/leaderboard')
 def leaderboard():
     """Leaderboard page"""
-    response = make_response(render_template('leaderboard.html'))
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    return render_template('leaderboard.html')
 
 @app.route('/models')
 def models():
     """Models page"""
-    response = make_response(render_template('models.html'))
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    return render_template('models.html')
 
 @app.route('/api/agents')
 def api_agents():
     """API endpoint for agent data"""
     agents = data_manager.get_agents_data()
-    response = make_response(jsonify(agents))
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    return fast_json(agents)
 
 @app.route('/api/market')
 def api_market():
     """API endpoint for market data"""
     market = data_manager.get_market_data()
-    response = make_response(jsonify(market))
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    return fast_json(market)
 
 @app.route('/api/leaderboard')
 def api_leaderboard():
     """API endpoint for leaderboard data"""
     leaderboard = data_manager.get_leaderboard_data()
-    response = make_response(jsonify(leaderboard))
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    return fast_json(leaderboard)
 
 @socketio.on('connect')
 def handle_connect(auth=None):
@@ -352,11 +409,9 @@ def handle_disconnect():
 
 @socketio.on('request_update')
 def handle_request_update():
-    # Force fresh read from XML file
-    data_manager.__init__('trade.xml')  # Reinitialize to clear any cached data
-    agents = data_manager.get_agents_data()
-    market = data_manager.get_market_data()
-    leaderboard = data_manager.get_leaderboard_data()
+    # The mtime cache already serves fresh data after every trade.xml write,
+    # so no manual invalidation is needed here
+    agents, market, leaderboard = data_manager.snapshot()
 
     # Get the latest timestamp from agents
     latest_timestamp = datetime.now().isoformat()
@@ -374,12 +429,23 @@ def handle_request_update():
 
 def background_update():
     """Background task for periodic updates"""
+    last_key = None
     while True:
         try:
+            # Skip the tick entirely if trade.xml hasn't changed; nothing
+            # new to serialize or broadcast
+            try:
+                st = os.stat(data_manager.xml_file)
+                key = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                key = None
+            if key == last_key:
+                socketio.sleep(5)
+                continue
+            last_key = key
+
             # Send updates to all connected clients
-            agents = data_manager.get_agents_data()
-            market = data_manager.get_market_data()
-            leaderboard = data_manager.get_leaderboard_data()
+            agents, market, leaderboard = data_manager.snapshot()
 
             # Get the latest timestamp from agents
             latest_timestamp = datetime.now().isoformat()
@@ -402,12 +468,11 @@ def background_update():
             logger.info(f"Error in background update: {e}")
 
         # Update every 5 seconds
-        time.sleep(5)
+        socketio.sleep(5)
 
-# Start background thread
-update_thread = threading.Thread(target=background_update)
-update_thread.daemon = True
-update_thread.start()
+# Run the updater through Flask-SocketIO's background task machinery so
+# emits cooperate with its async model instead of firing from a raw thread
+socketio.start_background_task(background_update)
 
 # Setup file watcher for dashboard files
 file_handler = DashboardFileHandler()
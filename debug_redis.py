@@ -14,16 +14,23 @@ async def debug_redis():
     sorted_set_key = get_sorted_set_key('BTCUSDT', '5m')
     print(f'Checking sorted set: {sorted_set_key}')
 
-    exists = await redis.exists(sorted_set_key)
+    # The sorted-set probes are independent, so one pipelined round trip
+    # answers all of them instead of four serial awaits
+    async with redis.pipeline(transaction=False) as pipe:
+        await pipe.exists(sorted_set_key)
+        await pipe.zcard(sorted_set_key)
+        await pipe.zrange(sorted_set_key, 0, 4, withscores=True)
+        await pipe.zrange(sorted_set_key, 0, 0, withscores=True)
+        await pipe.zrange(sorted_set_key, -1, -1, withscores=True)
+        exists, count, samples, min_score, max_score = await pipe.execute()
+
     print(f'Sorted set exists: {exists}')
 
     if exists:
-        count = await redis.zcard(sorted_set_key)
         print(f'Number of elements in sorted set: {count}')
 
         if count > 0:
             # Get some sample data
-            samples = await redis.zrange(sorted_set_key, 0, 4, withscores=True)
             print('First 5 samples from sorted set:')
             for member, score in samples:
                 print(f'  Score: {score}, Member preview: {str(member)[:100]}...')
@@ -45,9 +52,7 @@ async def debug_redis():
 
     # Check what data range actually exists
     if exists and count > 0:
-        # Get min and max scores
-        min_score = await redis.zrange(sorted_set_key, 0, 0, withscores=True)
-        max_score = await redis.zrange(sorted_set_key, -1, -1, withscores=True)
+        # Min and max scores were fetched in the pipeline above
         if min_score and max_score:
             min_ts = int(min_score[0][1])
             max_ts = int(max_score[0][1])
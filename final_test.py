@@ -1,9 +1,15 @@
 import asyncio
+import logging
 import signal
 import sys
+from logging_config import logger
 from Agent import TradingAgent
 from MarketCoordinator import MarketCoordinator
 
+# Checked once so the per-iteration f-strings aren't formatted when INFO
+# logging is turned off
+_INFO = logger.isEnabledFor(logging.INFO)
+
 # Global variable to control the loop
 running = True
 
@@ -44,24 +50,31 @@ async def main():
                 # Prepare the market state
                 user_prompt = await coordinator.prepare_market_state()
                 
-                logger.info(f"Market state prepared at {count + 1}/3")
+                if _INFO:
+                    logger.info(f"Market state prepared at {count + 1}/3")
                 
                 # Pass the market data to the trading agent
                 await agent.process_user_prompt(user_prompt)
                 
-                logger.info(f"Prompt processed. Waiting for next update...")
+                logger.info("Prompt processed. Waiting for next update...")
                 
                 # Wait for 10 seconds before next update (instead of 60 for testing)
                 await asyncio.sleep(10)
                 count += 1
                 
             except Exception as e:
+                # Error path: never gate this behind _INFO - the f-string only
+                # formats once an exception has already happened, and silently
+                # sleeping on failure would hide it entirely
                 logger.info(f"Error in market coordinator: {e}")
                 await asyncio.sleep(10)  # Wait before retrying
                 
     except KeyboardInterrupt:
         logger.info("\nShutting down trading system...")
         logger.info("Market coordinator stopped.")
+    finally:
+        # Flush the deferred XML write and close the coordinator's sessions
+        await coordinator.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -9,9 +9,8 @@ from redis_utils import get_redis_connection, get_sorted_set_key
 
 COINS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "XRPUSDT", "DOGEUSDT", "SOLUSDT"]
 
-async def fix_sorted_set(symbol: str, resolution: str = "5m"):
+async def fix_sorted_set(symbol: str, redis, resolution: str = "5m"):
     """Fix the sorted set by adding missing historical data."""
-    redis = await get_redis_connection()
     sorted_set_key = get_sorted_set_key(symbol, resolution)
 
     print(f"Fixing {symbol} sorted set: {sorted_set_key}")
@@ -34,46 +33,45 @@ async def fix_sorted_set(symbol: str, resolution: str = "5m"):
 
     print(f"Current sorted set has {len(existing_timestamps)} entries")
 
-    # Process keys that aren't in the sorted set
+    # Collect the keys that aren't in the sorted set yet
+    missing = []
+    for key in keys:
+        # Extract timestamp from key
+        parts = key.split(":")
+        if len(parts) == 4:
+            try:
+                timestamp = int(parts[3])
+            except ValueError:
+                continue
+
+            # Skip if already in sorted set
+            if timestamp not in existing_timestamps:
+                missing.append((key, timestamp))
+
+    # One MGET plus one multi-member ZADD per batch of 1000 replaces the
+    # old GET round-trip per key and ZADD per entry
     added_count = 0
-    async with redis.pipeline() as pipe:
-        for key in keys:
-            # Extract timestamp from key
-            parts = key.split(":")
-            if len(parts) == 4:
-                try:
-                    timestamp = int(parts[3])
-                except ValueError:
-                    continue
-
-                # Skip if already in sorted set
-                if timestamp in existing_timestamps:
-                    continue
-
-                # Get the data from the individual key
-                data_str = await redis.get(key)
-                if not data_str:
-                    continue
-
-                try:
-                    # Parse the JSON data
-                    kline_data = json.loads(data_str)
-
-                    # Add to sorted set
-                    await pipe.zadd(sorted_set_key, {data_str: timestamp})
-                    added_count += 1
-
-                    # Execute in batches
-                    if added_count % 1000 == 0:
-                        await pipe.execute()
-                        print(f"Added {added_count} {symbol} entries so far")
-
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse JSON for key {key}: {e}")
-                    continue
-
-        # Execute any remaining commands
-        await pipe.execute()
+    batch_size = 1000
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:start + batch_size]
+        values = await redis.mget([key for key, _ in batch])
+
+        mapping = {}
+        for (key, timestamp), data_str in zip(batch, values):
+            if not data_str:
+                continue
+            try:
+                # Parse the JSON data to validate it
+                json.loads(data_str)
+            except json.JSONDecodeError as e:
+                print(f"Failed to parse JSON for key {key}: {e}")
+                continue
+            mapping[data_str] = timestamp
+
+        if mapping:
+            await redis.zadd(sorted_set_key, mapping)
+            added_count += len(mapping)
+            print(f"Added {added_count} {symbol} entries so far")
 
     print(f"Added {added_count} missing {symbol} entries to sorted set")
 
@@ -89,11 +87,15 @@ async def fix_sorted_set(symbol: str, resolution: str = "5m"):
             data = json.loads(data_str)
             print(f"  Time: {data['time']}, Price: {data['close']}")
 
+async def fix_coin(symbol: str, redis):
+    """Fix one coin and report completion."""
+    await fix_sorted_set(symbol, redis)
+    print(f"--- Completed {symbol} ---\n")
+
 async def main():
-    """Fix all coins."""
-    for coin in COINS:
-        await fix_sorted_set(coin)
-        print(f"--- Completed {coin} ---\n")
+    """Fix all coins concurrently over one shared connection."""
+    redis = await get_redis_connection()
+    await asyncio.gather(*(fix_coin(coin, redis) for coin in COINS))
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,4 +1,17 @@
-import xml.etree.ElementTree as ET
+import numpy as np
+from indicators_numba import njit
+from XmlManager import ET
+
+
+@njit(cache=True, fastmath=True)
+def _compute_pnl(entries, exits, quantities, leverages, is_long):
+    """Signed PNL per trade; compiled so large closed-trade lists stay cheap"""
+    out = np.empty_like(entries)
+    for i in range(entries.size):
+        diff = exits[i] - entries[i] if is_long[i] else entries[i] - exits[i]
+        out[i] = diff * abs(quantities[i]) * leverages[i]
+    return out
+
 
 # Parse XML
 tree = ET.parse('trade.xml')
@@ -13,36 +26,51 @@ if agent is None:
 # Get closed trades
 closed_trades = agent.findall('closed_trades/trade')
 
+# First pass: collect the trades with a valid position_type so the arrays
+# stay aligned with the elements they came from
+valid = []
+entries = []
+exits = []
+quantities = []
+leverages = []
+is_long = []
 for trade in closed_trades:
     coin = trade.find('coin').text
-    entry_price = float(trade.find('entry_price').text or 0)
-    exit_price = float(trade.find('price').text or 0)  # exit_price is stored as 'price'
-    quantity = float(trade.find('quantity').text or 0)
-    leverage = int(trade.find('leverage').text or 1)
     position_type_elem = trade.find('position_type')
     if position_type_elem is None:
         print(f"Warning: Missing position_type for {coin} trade, skipping")
         continue
     position_type = position_type_elem.text
-
-    # Calculate correct PNL
-    if position_type == "long":
-        correct_pnl = (exit_price - entry_price) * abs(quantity) * leverage
-    elif position_type == "short":
-        correct_pnl = (entry_price - exit_price) * abs(quantity) * leverage
-    else:
+    if position_type not in ("long", "short"):
         print(f"Warning: Invalid position_type '{position_type}' for {coin} trade, skipping")
         continue
 
-    # Update the pnl element
+    valid.append(trade)
+    entries.append(float(trade.find('entry_price').text or 0))
+    exits.append(float(trade.find('price').text or 0))  # exit_price is stored as 'price'
+    quantities.append(float(trade.find('quantity').text or 0))
+    leverages.append(int(trade.find('leverage').text or 1))
+    is_long.append(position_type == "long")
+
+# Calculate correct PNL for every trade in one compiled pass
+entries = np.asarray(entries, dtype=np.float64)
+exits = np.asarray(exits, dtype=np.float64)
+quantities = np.asarray(quantities, dtype=np.float64)
+leverages = np.asarray(leverages, dtype=np.float64)
+is_long = np.asarray(is_long, dtype=np.bool_)
+pnls = _compute_pnl(entries, exits, quantities, leverages, is_long)
+
+# Second pass: write the corrected values back
+for trade, correct_pnl in zip(valid, pnls):
+    coin = trade.find('coin').text
     pnl_elem = trade.find('pnl')
     if pnl_elem is not None:
         old_pnl = float(pnl_elem.text or 0)
-        pnl_elem.text = str(correct_pnl)
-        print(f"Updated {coin} trade PNL: {old_pnl} -> {correct_pnl}")
+        pnl_elem.text = str(float(correct_pnl))
+        print(f"Updated {coin} trade PNL: {old_pnl} -> {float(correct_pnl)}")
     else:
         print(f"Warning: No pnl element for {coin} trade")
 
 # Save the XML
 tree.write('trade.xml', encoding="utf-8", xml_declaration=True)
-print("Closed trades PNL fixed")
\ No newline at end of file
+print("Closed trades PNL fixed")
@@ -0,0 +1,28 @@
+import asyncio
+import aiohttp
+
+# One keep-alive session for the whole process: repeated HTTPS calls to the
+# same hosts reuse warm TCP/TLS connections and the cached DNS answer
+# instead of paying a fresh handshake per request
+_session = None
+_session_lock = asyncio.Lock()
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared ClientSession, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        async with _session_lock:
+            if _session is None or _session.closed:
+                _session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=75)
+                )
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared session on shutdown."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,199 @@
+"""JIT-compiled indicator kernels for the simulation market-state path.
+
+These implement the standard EMA/RSI/MACD/ATR recurrences so the whole
+seeding pass for a coin runs in a single compiled call instead of several
+separate C-call transitions on small (<=50 point) arrays, where call
+overhead dominates the math. numba is optional: without it the kernels
+still run as plain Python/NumPy, just slower.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op decorator fallback when numba is not installed"""
+        def wrap(func):
+            return func
+        if args and callable(args[0]):
+            return args[0]
+        return wrap
+
+
+@njit(cache=True)
+def ema(x, period):
+    """EMA with SMA seed, NaN during the warm-up (matches ta-lib)"""
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+
+    total = 0.0
+    for i in range(period):
+        total += x[i]
+    prev = total / period
+    out[period - 1] = prev
+
+    alpha = 2.0 / (period + 1.0)
+    for i in range(period, n):
+        prev = prev + alpha * (x[i] - prev)
+        out[i] = prev
+    return out
+
+
+@njit(cache=True)
+def rsi(x, period):
+    """Wilder-smoothed RSI, NaN during the warm-up (matches ta-lib)"""
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if n < period + 1:
+        return out
+
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        change = x[i] - x[i - 1]
+        if change > 0:
+            avg_gain += change
+        else:
+            avg_loss -= change
+    avg_gain /= period
+    avg_loss /= period
+    if avg_loss == 0.0:
+        out[period] = 100.0
+    else:
+        out[period] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    for i in range(period + 1, n):
+        change = x[i] - x[i - 1]
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+        if avg_loss == 0.0:
+            out[i] = 100.0
+        else:
+            out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+
+@njit(cache=True)
+def macd(x, fastperiod, slowperiod, signalperiod):
+    """MACD line and signal line (EMA of the MACD line)"""
+    n = x.shape[0]
+    ema_fast = ema(x, fastperiod)
+    ema_slow = ema(x, slowperiod)
+
+    macd_line = np.full(n, np.nan)
+    for i in range(n):
+        if not np.isnan(ema_fast[i]) and not np.isnan(ema_slow[i]):
+            macd_line[i] = ema_fast[i] - ema_slow[i]
+
+    signal_line = np.full(n, np.nan)
+    start = slowperiod - 1
+    if start + signalperiod <= n:
+        total = 0.0
+        for i in range(start, start + signalperiod):
+            total += macd_line[i]
+        prev = total / signalperiod
+        signal_line[start + signalperiod - 1] = prev
+
+        alpha = 2.0 / (signalperiod + 1.0)
+        for i in range(start + signalperiod, n):
+            prev = prev + alpha * (macd_line[i] - prev)
+            signal_line[i] = prev
+
+    return macd_line, signal_line
+
+
+@njit(cache=True)
+def atr(high, low, close, period):
+    """Wilder-smoothed ATR, NaN during the warm-up (matches ta-lib)"""
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    if n < period + 1:
+        return out
+
+    total = 0.0
+    for i in range(1, period + 1):
+        tr = high[i] - low[i]
+        hc = abs(high[i] - close[i - 1])
+        lc = abs(low[i] - close[i - 1])
+        if hc > tr:
+            tr = hc
+        if lc > tr:
+            tr = lc
+        total += tr
+    prev = total / period
+    out[period] = prev
+
+    for i in range(period + 1, n):
+        tr = high[i] - low[i]
+        hc = abs(high[i] - close[i - 1])
+        lc = abs(low[i] - close[i - 1])
+        if hc > tr:
+            tr = hc
+        if lc > tr:
+            tr = lc
+        prev = (prev * (period - 1) + tr) / period
+        out[i] = prev
+    return out
+
+
+@njit(cache=True)
+def compute_all_indicators(prices, highs, lows):
+    """Compute every series the market-state seeding needs in one compiled call.
+
+    Returns (ema20, ema50, ema12, ema26, macd_line, macd_signal,
+    rsi7, rsi14, atr3, atr14).
+    """
+    ema20 = ema(prices, 20)
+    ema50 = ema(prices, 50)
+    ema12 = ema(prices, 12)
+    ema26 = ema(prices, 26)
+    macd_line, macd_signal = macd(prices, 12, 26, 9)
+    rsi7 = rsi(prices, 7)
+    rsi14 = rsi(prices, 14)
+    atr3 = atr(highs, lows, prices, 3)
+    atr14 = atr(highs, lows, prices, 14)
+    return ema20, ema50, ema12, ema26, macd_line, macd_signal, rsi7, rsi14, atr3, atr14
+
+
+@njit(parallel=True, cache=True)
+def batch_all_indicators(prices, highs, lows):
+    """compute_all_indicators across stacked (n_coins, n_points) inputs.
+
+    Rows are independent, so the coin loop is a prange: each coin's seeding
+    pass runs on its own core outside the GIL. Returns the same ten outputs
+    as compute_all_indicators, each shaped (n_coins, n_points).
+    """
+    n_coins, n = prices.shape
+    out_ema20 = np.empty((n_coins, n))
+    out_ema50 = np.empty((n_coins, n))
+    out_ema12 = np.empty((n_coins, n))
+    out_ema26 = np.empty((n_coins, n))
+    out_macd = np.empty((n_coins, n))
+    out_signal = np.empty((n_coins, n))
+    out_rsi7 = np.empty((n_coins, n))
+    out_rsi14 = np.empty((n_coins, n))
+    out_atr3 = np.empty((n_coins, n))
+    out_atr14 = np.empty((n_coins, n))
+    for i in prange(n_coins):
+        out_ema20[i] = ema(prices[i], 20)
+        out_ema50[i] = ema(prices[i], 50)
+        out_ema12[i] = ema(prices[i], 12)
+        out_ema26[i] = ema(prices[i], 26)
+        macd_line, signal_line = macd(prices[i], 12, 26, 9)
+        out_macd[i] = macd_line
+        out_signal[i] = signal_line
+        out_rsi7[i] = rsi(prices[i], 7)
+        out_rsi14[i] = rsi(prices[i], 14)
+        out_atr3[i] = atr(highs[i], lows[i], prices[i], 3)
+        out_atr14[i] = atr(highs[i], lows[i], prices[i], 14)
+    return (out_ema20, out_ema50, out_ema12, out_ema26, out_macd,
+            out_signal, out_rsi7, out_rsi14, out_atr3, out_atr14)
@@ -1,40 +1,64 @@
 import asyncio
+# uvloop speeds up asyncio scheduling on Linux; optional on Windows
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+from logging_config import logger
 from MarketCoordinator import MarketCoordinator
 from Agent import TradingAgent
 
 async def integration_test():
     logger.info("Starting integration test...")
-    
+
     # Initialize both components
     coordinator = MarketCoordinator()
     agent = TradingAgent()
-    
+
     logger.info("Both coordinator and agent initialized successfully")
-    
+
     # Test the market state preparation
     logger.info("\nTesting market state preparation...")
     market_prompt = await coordinator.prepare_market_state()
     logger.info(f"Market prompt generated with length: {len(market_prompt)} characters")
-    
-    # Check if XML was updated with state_of_market
-    import xml.etree.ElementTree as ET
+
+    # The coordinator defers XML writes until its cycle loop (or close())
+    # flushes them - flush now so the file we parse below reflects the
+    # state we just prepared rather than a stale document
+    await coordinator.close()
+
+    # Check if XML was updated with state_of_market; stream the coin
+    # sections instead of materializing the whole trade document
+    from XmlManager import ET, LXML_AVAILABLE
     try:
-        tree = ET.parse("trade.xml")
-        root = tree.getroot()
-        
-        state_of_market = root.find("state_of_market")
-        if state_of_market is not None:
-            logger.info(f"\nFound state_of_market section with {len(state_of_market.findall('coin'))} coins")
-            for coin in state_of_market.findall("coin"):
-                name = coin.find("name").text
-                data = coin.find("data").text
+        coin_names = []
+        if LXML_AVAILABLE:
+            context = ET.iterparse("trade.xml", tag="coin", events=("end",))
+        else:
+            context = (
+                (event, elem) for event, elem in ET.iterparse("trade.xml", events=("end",))
+                if elem.tag == "coin"
+            )
+        for _, coin in context:
+            name = coin.findtext("name")
+            if name:
+                coin_names.append(name)
+            coin.clear()
+            if LXML_AVAILABLE and coin.getparent() is not None:
+                while coin.getprevious() is not None:
+                    del coin.getparent()[0]
+
+        if coin_names:
+            logger.info(f"\nFound state_of_market section with {len(coin_names)} coins")
+            for name in coin_names:
                 logger.info(f"  {name}: Data updated")
         else:
             logger.info("\nstate_of_market section NOT found in XML")
     except Exception as e:
         logger.info(f"Error reading XML: {e}")
-    
+
     logger.info("\nIntegration test completed successfully!")
 
 if __name__ == "__main__":
-    asyncio.run(integration_test())
\ No newline at end of file
+    asyncio.run(integration_test())
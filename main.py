@@ -2,15 +2,48 @@ import asyncio
 import os
 import sys
 import threading
-import xml.etree.ElementTree as ET
+# uvloop cuts asyncio scheduling overhead substantially on Linux; fall
+# back to the default selector loop where it isn't available (Windows)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+# Prefer serving the dashboard on the coordinator's own event loop; the
+# dedicated socketio.run thread is only a fallback when uvicorn is missing
+try:
+    import uvicorn
+    from uvicorn.middleware.wsgi import WSGIMiddleware
+    UVICORN_AVAILABLE = True
+except ImportError:
+    UVICORN_AVAILABLE = False
+from XmlManager import ET, TradingXMLManager
+from config import CONFIG
+from http_session import close_session
 from Agent import TradingAgent
 from AgentDeepSeek import AgentDeepSeek
 from AgentDeepSeekLocal import AgentDeepSeekLocal
 from MarketCoordinator import MarketCoordinator
-from XmlManager import TradingXMLManager
 from dashboard import app, socketio
 from logging_config import logger
 
+# Default summary fields for a freshly created agent section
+_SUMMARY_DEFAULTS = (
+    ("available_cash", "10000.0"),
+    ("current_account_value", "10000.0"),
+    ("sharpe_ratio", "0.0"),
+)
+
+def _ensure_child(parent, tag, text=None):
+    """Return parent's <tag> child, creating it with default text if missing."""
+    elem = parent.find(tag)
+    if elem is not None:
+        return elem, False
+    elem = ET.SubElement(parent, tag)
+    if text is not None:
+        elem.text = text
+    return elem, True
+
 def run_dashboard():
     """Run the Flask dashboard server in a separate thread"""
     logger.info("Starting dashboard server on all IPs...")
@@ -26,9 +59,12 @@ async def main():
     # Check for --simulation parameter
     simulation_mode = "--simulation" in sys.argv
 
+    # One manager for the whole startup sequence; constructing a second
+    # instance later just parsed and rewrote the same document again
+    xml_manager = TradingXMLManager()
+
     if fresh_start:
         logger.info("Fresh start requested. Clearing all active and closed trades from XML...")
-        xml_manager = TradingXMLManager()
         xml_manager.clear_all_trades()
         logger.info("All trades cleared successfully!")
 
@@ -36,19 +72,20 @@ async def main():
         # Get all agent sections and reset them
         agents_elem = xml_manager.root.find("agents")
         if agents_elem is not None:
-            for agent_elem in agents_elem.findall("agent"):
-                kind = agent_elem.get("kind")
-                xml_manager.update_account_summary(
-                    kind=kind,
-                    available_cash=10000.0,
-                    current_account_value=10000.0,
-                    sharpe_ratio=0.0,
-                    total_return=0.0
-                )
+            with xml_manager.batch():
+                for agent_elem in agents_elem.findall("agent"):
+                    kind = agent_elem.get("kind")
+                    xml_manager.update_account_summary(
+                        kind=kind,
+                        available_cash=10000.0,
+                        current_account_value=10000.0,
+                        sharpe_ratio=0.0,
+                        total_return=0.0
+                    )
         logger.info("Account summary reset to initial values for all agents!")
 
     # Check if API key exists
-    if not os.getenv("DEEPSEEK_API_KEY"):
+    if not CONFIG.deepseek_api_key:
         logger.info("Warning: DEEPSEEK_API_KEY not found in environment variables.")
         logger.info("Please add your API key to the .env file to use the full functionality.")
 
@@ -59,29 +96,28 @@ async def main():
     #agents = [agent_deepseek_local]
     logger.info(f"Initialized agents: {[agent.kind for agent in agents]}")
 
-    # Initialize agent sections in XML for all agents
-    xml_manager = TradingXMLManager()
+    # Initialize agent sections in XML for all agents, coalescing every
+    # mutation into at most one write; a fully initialized document is
+    # left untouched
     active_kinds = [agent.kind for agent in agents]
-    xml_manager.remove_unused_agents(active_kinds)
-    for agent in agents:
-        # Create agent section if it doesn't exist
-        agent_elem = xml_manager.get_agent_section(agent.kind)
-        # Ensure summary section exists
-        summary_elem = agent_elem.find("summary")
-        if summary_elem is None:
-            summary_elem = ET.SubElement(agent_elem, "summary")
-            ET.SubElement(summary_elem, "available_cash").text = "10000.0"
-            ET.SubElement(summary_elem, "current_account_value").text = "10000.0"
-            ET.SubElement(summary_elem, "sharpe_ratio").text = "0.0"
-        # Ensure active_trades section exists
-        active_trades_elem = agent_elem.find("active_trades")
-        if active_trades_elem is None:
-            ET.SubElement(agent_elem, "active_trades")
-        # Ensure closed_trades section exists
-        closed_trades_elem = agent_elem.find("closed_trades")
-        if closed_trades_elem is None:
-            ET.SubElement(agent_elem, "closed_trades")
-    xml_manager._write_xml()
+    created = False
+    with xml_manager.batch():
+        xml_manager.remove_unused_agents(active_kinds)
+        for agent in agents:
+            # Create agent section if it doesn't exist
+            agent_elem = xml_manager.get_agent_section(agent.kind)
+            # Ensure the summary section and its default fields exist
+            summary_elem, was_created = _ensure_child(agent_elem, "summary")
+            created = created or was_created
+            for tag, default in _SUMMARY_DEFAULTS:
+                _, was_created = _ensure_child(summary_elem, tag, default)
+                created = created or was_created
+            # Ensure the trade sections exist
+            for tag in ("active_trades", "closed_trades"):
+                _, was_created = _ensure_child(agent_elem, tag)
+                created = created or was_created
+        if created:
+            xml_manager._mark_dirty()
     logger.info("Agent sections initialized in XML")
     logger.info("Trading agents initialized successfully!")
 
@@ -89,10 +125,17 @@ async def main():
     coordinator = MarketCoordinator(simulation_mode=simulation_mode)
     logger.info(f"Market coordinator initialized successfully! (Mode: {'Simulation' if simulation_mode else 'Live'})")
 
-    # Start dashboard server in a separate thread
-    dashboard_thread = threading.Thread(target=run_dashboard)
-    dashboard_thread.daemon = True
-    dashboard_thread.start()
+    # Serve the dashboard in-process on the same asyncio loop as the
+    # coordinator instead of spinning up a second blocking server thread;
+    # socket.io traffic still flows through flask_socketio's middleware
+    if UVICORN_AVAILABLE:
+        config = uvicorn.Config(WSGIMiddleware(app), host='0.0.0.0', port=5000,
+                                loop="asyncio", lifespan="off", log_level="warning")
+        asyncio.create_task(uvicorn.Server(config).serve())
+    else:
+        dashboard_thread = threading.Thread(target=run_dashboard)
+        dashboard_thread.daemon = True
+        dashboard_thread.start()
     logger.info("Dashboard server started on all IPs (0.0.0.0:5000)")
 
     try:
@@ -106,6 +149,8 @@ async def main():
     except KeyboardInterrupt:
         logger.info("\nShutting down trading system...")
         logger.info("Market coordinator stopped.")
+    finally:
+        await close_session()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -14,10 +14,13 @@ REDIS_PASSWORD = None
 REDIS_TIMEOUT = 10  # Increased socket timeout
 REDIS_RETRY_COUNT = 3
 REDIS_RETRY_DELAY = 1
+import functools
 import logging
+import numpy as np
 
 from datetime import datetime, timezone
 import httpx
+from config import CONFIG
 import ssl
 import time
 
@@ -162,6 +165,7 @@ def get_sync_redis_connection() -> SyncRedis:
         raise Exception("Redis sync client is None after attempting initialization.")
     return sync_redis_client
 
+@functools.lru_cache(maxsize=8)
 def get_timeframe_seconds(resolution: str) -> int:
     """Get timeframe in seconds for a given resolution."""
     multipliers = {"1m": 60, "5m": 300, "1h": 3600, "4h": 14400, "1d": 86400, "1w": 604800}
@@ -287,6 +291,47 @@ async def get_cached_klines_individual_range(symbol: str, resolution: str, start
         return []
 
 
+async def get_cached_klines_batch(symbols: list[str], resolution: str, start_ts: int, end_ts: int) -> Dict[str, list[Dict[str, Any]]]:
+    """Get cached klines for several symbols in one Redis round trip.
+
+    Builds the individual kline keys for every symbol in the range and
+    fetches them with a single MGET instead of one GET per timestamp per
+    symbol, so the per-tick cost is one RTT rather than symbols x points.
+
+    Returns:
+        Dict mapping each symbol to its list of OHLCV dicts (possibly empty)
+    """
+    try:
+        redis = await get_redis_connection()
+        timeframe_seconds = get_timeframe_seconds(resolution)
+
+        timestamps = list(range(start_ts, end_ts + 1, timeframe_seconds))
+        keys = [
+            get_redis_key(symbol, resolution, ts)
+            for symbol in symbols
+            for ts in timestamps
+        ]
+        values = await redis.mget(keys) if keys else []
+
+        klines_by_symbol: Dict[str, list[Dict[str, Any]]] = {}
+        per_symbol = len(timestamps)
+        for i, symbol in enumerate(symbols):
+            klines_data = []
+            for data_str in values[i * per_symbol:(i + 1) * per_symbol]:
+                if data_str:
+                    if isinstance(data_str, bytes):
+                        data_str = data_str.decode('utf-8')
+                    klines_data.append(json.loads(data_str))
+            klines_by_symbol[symbol] = klines_data
+
+        logger.info(f"Batch-fetched klines for {len(symbols)} symbols {resolution} between {start_ts} and {end_ts}")
+        return klines_by_symbol
+
+    except Exception as e:
+        logger.error(f"Error batch-getting cached klines for {symbols} {resolution} from {start_ts} to {end_ts}: {e}")
+        return {symbol: [] for symbol in symbols}
+
+
 async def get_cached_klines(symbol: str, resolution: str, start_ts: int, end_ts: int) -> list[Dict[str, Any]]:
     # Defensive check: if timestamps are None, return empty list as we can't proceed with None values
     if start_ts is None or end_ts is None:
@@ -463,28 +508,31 @@ async def cache_klines(symbol: str, resolution: str, klines: list[Dict[str, Any]
         # Sorting by time is good practice, though the Redis operations for each timestamp are independent.
         klines_to_process = sorted(list(unique_klines_for_caching.values()), key=lambda x: x['time'])
 
-        pipeline_batch_size = 500  # Execute pipeline every N klines
+        chunk_size = 1000  # Klines per pipeline execution
         sorted_set_key = get_sorted_set_key(symbol, resolution)
-        async with redis.pipeline() as pipe:
-            for kline in klines_to_process:
-                timestamp = kline["time"]
-                data_str = json.dumps(kline)
-
-                # Update/set the individual kline key (e.g., kline:BTCUSDT:5m:1234567890)
-                # This key stores the JSON string for a single kline at its exact timestamp.
-                individual_key = get_redis_key(symbol, resolution, timestamp)
-                await pipe.setex(individual_key, expiration.get(resolution, 60 * 60 * 24), data_str)
-
-                # For the sorted set (e.g., zset:kline:BTCUSDT:5m), ensure uniqueness per timestamp score.
-                # 1. Remove any existing members that have this exact timestamp as their score.
-                await pipe.zremrangebyscore(sorted_set_key, timestamp, timestamp)
-                # 2. Add the current (and now unique for this timestamp) kline data.
-                await pipe.zadd(sorted_set_key, {data_str: timestamp})
-
-                # Execute in batches
-                if len(pipe) >= pipeline_batch_size * 3:  # Each kline adds 3 commands (setex, zremrangebyscore, zadd)
-                    await pipe.execute()
-            await pipe.execute()  # Execute any remaining commands in the pipeline
+        ttl = expiration.get(resolution, 60 * 60 * 24)
+        async with redis.pipeline(transaction=False) as pipe:
+            for start in range(0, len(klines_to_process), chunk_size):
+                chunk = klines_to_process[start:start + chunk_size]
+                # Accumulate the whole chunk into one multi-member ZADD
+                # mapping instead of issuing one ZADD per kline
+                mapping: Dict[str, int] = {}
+                for kline in chunk:
+                    timestamp = kline["time"]
+                    data_str = json.dumps(kline)
+
+                    # Update/set the individual kline key (e.g., kline:BTCUSDT:5m:1234567890)
+                    # This key stores the JSON string for a single kline at its exact timestamp.
+                    individual_key = get_redis_key(symbol, resolution, timestamp)
+                    await pipe.setex(individual_key, ttl, data_str)
+
+                    # For the sorted set (e.g., zset:kline:BTCUSDT:5m), ensure uniqueness
+                    # per timestamp score by removing any existing member at this score.
+                    await pipe.zremrangebyscore(sorted_set_key, timestamp, timestamp)
+                    mapping[data_str] = timestamp
+                # Add the chunk's (now unique per timestamp) klines in one command.
+                await pipe.zadd(sorted_set_key, mapping)
+                await pipe.execute()
 
         # Trim the sorted set to keep a manageable number of recent klines.
         max_sorted_set_entries = 10000  # Increased from 5000 to support longer time ranges
@@ -505,6 +553,35 @@ async def get_cached_open_interest(symbol: str, resolution: str, start_ts: int,
         logger.error(f"Error in get_cached_open_interest: {e}", exc_info=True)
         return []
 
+async def get_cached_open_interest_batch(symbol_ranges: Dict[str, tuple], resolution: str) -> Dict[str, list[Dict[str, Any]]]:
+    """Get cached open interest for several symbols in one pipelined round trip.
+
+    Args:
+        symbol_ranges: Dict mapping symbol to its (start_ts, end_ts) range,
+            so callers holding partial windows only ask for the new tail
+        resolution: Timeframe resolution (e.g., '5m')
+
+    Returns:
+        Dict mapping each symbol to its list of open interest entries
+    """
+    try:
+        redis = await get_redis_connection()
+        symbols = list(symbol_ranges.keys())
+        async with redis.pipeline(transaction=False) as pipe:
+            for symbol in symbols:
+                range_start, range_end = symbol_ranges[symbol]
+                await pipe.zrangebyscore(get_sorted_set_oi_key(symbol, resolution), min=range_start, max=range_end, withscores=False)
+            results = await pipe.execute()
+        oi_by_symbol = {
+            symbol: [json.loads(item) for item in result]
+            for symbol, result in zip(symbols, results)
+        }
+        logger.info(f"Batch-fetched Open Interest for {len(symbols)} symbols {resolution}")
+        return oi_by_symbol
+    except Exception as e:
+        logger.error(f"Error in get_cached_open_interest_batch: {e}", exc_info=True)
+        return {symbol: [] for symbol in symbol_ranges}
+
 async def cache_open_interest(symbol: str, resolution: str, oi_data: list[Dict[str, Any]]) -> None:
     try:
         redis = await get_redis_connection()
@@ -811,46 +888,52 @@ def fetch_open_interest_from_bybit(symbol: str, resolution: str, start_ts: int,
     logger.info(f"Completed Bybit OI fetch for {symbol} {resolution}: {batch_count} batches, {total_records_received} total records received, {len(all_oi_data)} OI records processed")
     return all_oi_data
 
-def fetch_open_interest_from_binance(symbol: str, resolution: str, start_ts: int, end_ts: int) -> list[Dict[str, Any]]:
-    """Fetches open interest data from Binance API as fallback.
-    
-    Note: Binance futures_open_interest_hist doesn't support historical date ranges.
-    It only returns the most recent open interest data.
+def fetch_current_open_interest_from_binance(symbol: str) -> Optional[Dict[str, Any]]:
+    """Fetches the current open interest for a symbol from Binance.
+
+    Binance only exposes the present open interest value, so this takes no
+    date range - callers wanting history should use the Bybit fetcher.
     """
     logger.info(f"Fetching current open interest from Binance for {symbol}")
-    
+
     # Import required modules for Binance API
     try:
         from binance.client import Client
         # Use environment variables or default to None for public access
-        api_key = os.getenv('BINANCE_API_KEY')
-        api_secret = os.getenv('BINANCE_API_SECRET')
+        api_key = CONFIG.binance_api_key
+        api_secret = CONFIG.binance_api_secret
         client = Client(api_key, api_secret)
     except ImportError:
         logger.error("python-binance not installed. Cannot fetch from Binance API.")
-        return []
+        return None
     except Exception as e:
         logger.error(f"Failed to initialize Binance client: {e}")
-        return []
+        return None
 
     try:
         # Get current open interest from Binance (this is the only data available from their API)
         oi_data = client.futures_open_interest(symbol=symbol)
-        
-        # Create a single data point with current timestamp
-        current_ts = int(time.time())
-        formatted_data = [{
-            "time": current_ts,
+
+        logger.info(f"Fetched current open interest from Binance for {symbol}: {oi_data['openInterest']}")
+        return {
+            "time": int(time.time()),
             "open_interest": float(oi_data['openInterest']),
             "symbol": symbol
-        }]
-        
-        logger.info(f"Fetched current open interest from Binance for {symbol}: {oi_data['openInterest']}")
-        return formatted_data
-        
+        }
+
     except Exception as e:
         logger.error(f"Error fetching current open interest from Binance for {symbol}: {e}")
-        return []
+        return None
+
+
+def fetch_open_interest_from_binance(symbol: str, resolution: str, start_ts: int, end_ts: int) -> list[Dict[str, Any]]:
+    """Fetches open interest data from Binance API as fallback.
+
+    Note: Binance futures_open_interest_hist doesn't support historical date ranges,
+    so the range arguments are ignored and at most one (current) record is returned.
+    """
+    record = fetch_current_open_interest_from_binance(symbol)
+    return [record] if record else []
 
 
 def fetch_klines_from_bybit(symbol: str, resolution: str, start_ts: int, end_ts: int) -> list[Dict[str, Any]]:
@@ -937,8 +1020,8 @@ def fetch_klines_from_binance(symbol: str, resolution: str, start_ts: int, end_t
     try:
         from binance.client import Client
         # Use environment variables or default to None for public access
-        api_key = os.getenv('BINANCE_API_KEY')
-        api_secret = os.getenv('BINANCE_API_SECRET')
+        api_key = CONFIG.binance_api_key
+        api_secret = CONFIG.binance_api_secret
         client = Client(api_key, api_secret)
     except ImportError:
         logger.error("python-binance not installed. Cannot fetch from Binance API.")
@@ -1060,62 +1143,50 @@ async def detect_gaps_in_cached_data(symbol: str, resolution: str, start_ts: int
         redis = await get_redis_connection()
         sorted_set_key = get_sorted_set_key(symbol, resolution)
 
-        # Get all cached data in the time range
-        klines_data_redis = await redis.zrangebyscore(
+        # The scores ARE the kline timestamps, so gap detection only needs
+        # the scores - fetching withscores lets us skip decoding every JSON
+        # member (500k+ loads for a multi-year 5m range)
+        members = await redis.zrangebyscore(
             sorted_set_key,
             min=start_ts,
             max=end_ts,
-            withscores=False
+            withscores=True
         )
 
-        cached_data = []
-        for data_item in klines_data_redis:
-            try:
-                if isinstance(data_item, bytes):
-                    data_str = data_item.decode('utf-8')
-                elif isinstance(data_item, str):
-                    data_str = data_item
-                else:
-                    continue
-                parsed_data = json.loads(data_str)
-                cached_data.append(parsed_data)
-            except json.JSONDecodeError:
-                continue
-
-        if not cached_data:
+        if not members:
             logger.info(f"No cached data found for {symbol} {resolution} in range {start_ts} to {end_ts}")
             return []
 
-        # Sort by timestamp
-        cached_data.sort(key=lambda x: x['time'])
-        timestamps = [item['time'] for item in cached_data]
+        # zrangebyscore already returns members in score order
+        timestamps = np.fromiter((score for _, score in members), dtype=np.int64, count=len(members))
 
         expected_interval = get_timeframe_seconds(resolution)
         gaps = []
 
-        # Check for gaps between consecutive timestamps
-        for i in range(1, len(timestamps)):
-            gap = timestamps[i] - timestamps[i-1]
-            if gap > expected_interval:
-                missing_points = int(gap / expected_interval) - 1
-                gaps.append({
-                    'from_ts': timestamps[i-1] + expected_interval,
-                    'to_ts': timestamps[i] - expected_interval,
-                    'gap_seconds': gap - expected_interval,
-                    'missing_points': missing_points,
-                    'symbol': symbol,
-                    'resolution': resolution
-                })
+        # Locate interior gaps with one vectorized diff pass instead of a
+        # Python loop over every timestamp
+        diffs = np.diff(timestamps)
+        for i in np.nonzero(diffs > expected_interval)[0]:
+            gap = int(diffs[i])
+            missing_points = int(gap / expected_interval) - 1
+            gaps.append({
+                'from_ts': int(timestamps[i]) + expected_interval,
+                'to_ts': int(timestamps[i + 1]) - expected_interval,
+                'gap_seconds': gap - expected_interval,
+                'missing_points': missing_points,
+                'symbol': symbol,
+                'resolution': resolution
+            })
 
         # Check for gap at the beginning if start_ts is before first timestamp
-        if timestamps and start_ts < timestamps[0]:
-            gap = timestamps[0] - start_ts
+        if start_ts < timestamps[0]:
+            gap = int(timestamps[0]) - start_ts
             if gap > expected_interval:
                 missing_points = int(gap / expected_interval) - 1
                 if missing_points > 0:
                     gaps.append({
                         'from_ts': start_ts,
-                        'to_ts': timestamps[0] - expected_interval,
+                        'to_ts': int(timestamps[0]) - expected_interval,
                         'gap_seconds': gap - expected_interval,
                         'missing_points': missing_points,
                         'symbol': symbol,
@@ -1123,13 +1194,13 @@ async def detect_gaps_in_cached_data(symbol: str, resolution: str, start_ts: int
                     })
 
         # Check for gap at the end if end_ts is after last timestamp
-        if timestamps and end_ts > timestamps[-1]:
-            gap = end_ts - timestamps[-1]
+        if end_ts > timestamps[-1]:
+            gap = end_ts - int(timestamps[-1])
             if gap > expected_interval:
                 missing_points = int(gap / expected_interval) - 1
                 if missing_points > 0:
                     gaps.append({
-                        'from_ts': timestamps[-1] + expected_interval,
+                        'from_ts': int(timestamps[-1]) + expected_interval,
                         'to_ts': end_ts,
                         'gap_seconds': gap - expected_interval,
                         'missing_points': missing_points,
@@ -1237,7 +1308,7 @@ async def fetch_btc_dominance(symbol: str, resolution: str, start_ts: int, end_t
 async def fetch_cmc_historical_dominance(start_ts: int, end_ts: int) -> list[Dict[str, Any]]:
     """Try to fetch real historical BTC dominance from CoinMarketCap (requires paid plan)."""
     try:
-        api_key = os.getenv('CMC_API_KEY') or '2efa3a13-5837-4fe6-8dda-ffb11da22ef0'
+        api_key = CONFIG.cmc_api_key
 
         # CoinMarketCap historical global metrics endpoint (paid feature)
         url = "https://pro-api.coinmarketcap.com/v1/global-metrics/quotes/historical"
@@ -1298,7 +1369,7 @@ async def fetch_cmc_historical_dominance(start_ts: int, end_ts: int) -> list[Dic
 async def fetch_cmc_current_only(start_ts: int, end_ts: int) -> list[Dict[str, Any]]:
     """Fallback: Get current BTC dominance from CMC free endpoint."""
     try:
-        api_key = os.getenv('CMC_API_KEY') or '2efa3a13-5837-4fe6-8dda-ffb11da22ef0'
+        api_key = CONFIG.cmc_api_key
         current_dominance = await fetch_current_cmc_dominance(api_key)
 
         if current_dominance is not None:
@@ -1405,7 +1476,7 @@ async def fetch_from_apex_pro(start_ts: int, end_ts: int) -> list[Dict[str, Any]
 async def fetch_from_coinmarketcap(start_ts: int, end_ts: int) -> list[Dict[str, Any]]:
     """Fetch historical BTC dominance data from CoinMarketCap - Multiple approaches."""
     try:
-        api_key = os.getenv('CMC_API_KEY') or '2efa3a13-5837-4fe6-8dda-ffb11da22ef0'
+        api_key = CONFIG.cmc_api_key
 
         # Approach 1: Try current global metrics (free in Basic plan)
         current_dominance = await fetch_current_cmc_dominance(api_key)
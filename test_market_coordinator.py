@@ -4,7 +4,11 @@ from logging_config import logger
 
 async def test():
     coordinator = MarketCoordinator()
-    await coordinator.prepare_market_state()
+    try:
+        await coordinator.prepare_market_state()
+    finally:
+        # Flush the deferred XML write (and close the fetcher sessions)
+        await coordinator.close()
     logger.info('Test completed successfully')
 
 if __name__ == "__main__":